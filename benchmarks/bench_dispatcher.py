@@ -0,0 +1,100 @@
+"""Memory and tick latency of the timing-wheel dispatcher vs. one JobQueue job per chat.
+
+The JobQueue side needs the job-queue extra (pip install "python-telegram-bot[job-queue]").
+Run from the repository root:
+
+    python -m benchmarks.bench_dispatcher
+"""
+import asyncio
+import datetime
+import gc
+import random
+import time
+import tracemalloc
+
+from telegram.ext import Application
+
+from scheduler import QUIZ_INTERVAL, QuizDispatcher, quiz_phase
+
+SIZES = [100, 10_000, 100_000, 1_000_000]
+JOBQUEUE_MAX = 100_000
+TICKS = 200
+
+
+async def noop(*args):
+    pass
+
+
+def chat_ids(count):
+    rng = random.Random(count)
+    return [-1_000_000_000_000 - rng.randrange(10 ** 10) for _ in range(count)]
+
+
+async def measure_jobqueue(ids):
+    application = Application.builder().token('123456:ABCDEF').build()
+    job_queue = application.job_queue
+    await job_queue.start()
+    gc.collect()
+    tracemalloc.start()
+    for chat_id in ids:
+        job_queue.run_repeating(noop, interval=QUIZ_INTERVAL, first=QUIZ_INTERVAL + quiz_phase(chat_id), data=chat_id, name=str(chat_id))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # The scheduler's wakeup: find the jobs due in the next second. Jobs start one
+    # interval out so none of them actually fires while we measure.
+    jobstore = job_queue.scheduler._lookup_jobstore('default')
+    base = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=QUIZ_INTERVAL)
+    start = time.perf_counter()
+    for i in range(TICKS):
+        jobstore.get_due_jobs(base + datetime.timedelta(seconds=i))
+    tick = (time.perf_counter() - start) / TICKS
+
+    # schedule_quiz() for one chat: get_jobs_by_name scans every job.
+    start = time.perf_counter()
+    for chat_id in ids[:20]:
+        for job in job_queue.get_jobs_by_name(str(chat_id)):
+            job.schedule_removal()
+        job_queue.run_repeating(noop, interval=QUIZ_INTERVAL, first=QUIZ_INTERVAL + quiz_phase(chat_id), data=chat_id, name=str(chat_id))
+    reschedule = (time.perf_counter() - start) / 20
+    await job_queue.stop(wait=False)
+    return memory, tick, reschedule
+
+
+async def measure_dispatcher(ids):
+    gc.collect()
+    tracemalloc.start()
+    dispatcher = QuizDispatcher(noop)
+    for chat_id in ids:
+        dispatcher.add(chat_id)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    base = time.time()
+    start = time.perf_counter()
+    for i in range(TICKS):
+        dispatcher.tick(base + i)
+    tick = (time.perf_counter() - start) / TICKS
+
+    start = time.perf_counter()
+    for chat_id in ids[:20]:
+        dispatcher.remove(chat_id)
+        dispatcher.add(chat_id)
+    reschedule = (time.perf_counter() - start) / 20
+    return memory, tick, reschedule
+
+
+def main():
+    print(f"{'chats':>9} {'engine':>10} {'memory MB':>10} {'tick ms':>9} {'reschedule ms':>14}")
+    for size in SIZES:
+        ids = chat_ids(size)
+        engines = [("wheel", measure_dispatcher)]
+        if size <= JOBQUEUE_MAX:
+            engines.insert(0, ("jobqueue", measure_jobqueue))
+        for name, measure in engines:
+            memory, tick, reschedule = asyncio.run(measure(ids))
+            print(f"{size:>9} {name:>10} {memory / 1e6:>10.1f} {tick * 1e3:>9.3f} {reschedule * 1e3:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
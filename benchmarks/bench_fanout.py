@@ -0,0 +1,52 @@
+"""Completion time for a burst of due chats, sequential workers vs. fan-out.
+
+Each simulated send is what send_scheduled_quiz still awaits for a chat with
+auto-pin on: sendPoll, then pinChatMessage, with every Bot API call taking
+API_LATENCY seconds. Deleting the previous quiz is left out; it is handed to
+the deletion queue and happens off the send path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fanout
+"""
+import asyncio
+import time
+
+from scheduler import QUIZ_WORKERS, QuizDispatcher
+
+CHATS = [1_000, 10_000]
+API_LATENCY = 0.05
+CONCURRENCY = [1, 32, 128, 512]
+SEND_CALLS = ("sendPoll", "pinChatMessage")
+
+
+async def send_chain(chat_id):
+    for _ in SEND_CALLS:
+        await asyncio.sleep(API_LATENCY)
+
+
+async def run(chats, concurrency):
+    # concurrency=1 per worker reproduces the old one-chat-at-a-time workers.
+    dispatcher = QuizDispatcher(send_chain, concurrency=QUIZ_WORKERS if concurrency == 1 else concurrency)
+    dispatcher.start()
+    start = time.perf_counter()
+    for i in range(0, chats, dispatcher.batch_size):
+        dispatcher.queue.put_nowait((time.time(), list(range(i, min(chats, i + dispatcher.batch_size)))))
+    await dispatcher.queue.join()
+    elapsed = time.perf_counter() - start
+    await dispatcher.stop()
+    return elapsed, dispatcher.stats["max_batch_seconds"]
+
+
+def main():
+    print(f"{QUIZ_WORKERS} workers, {API_LATENCY * 1000:.0f} ms per API call, {len(SEND_CALLS)} calls per chat")
+    print(f"{'chats':>7} {'in flight':>10} {'total s':>9} {'slowest batch s':>16}")
+    for chats in CHATS:
+        for concurrency in CONCURRENCY:
+            label = "sequential" if concurrency == 1 else str(concurrency)
+            elapsed, slowest = asyncio.run(run(chats, concurrency))
+            print(f"{chats:>7} {label:>10} {elapsed:>9.2f} {slowest:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Recovery time of the journal chat store at 100k chats.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_journal_recovery
+"""
+import os
+import random
+import tempfile
+import time
+
+from chat_store import JournalChatConfigStore, default_chat_config
+
+CHATS = 100_000
+MUTATIONS_PER_CHAT = 5
+
+
+def open_store(directory, compact_bytes):
+    return JournalChatConfigStore(
+        journal_path=os.path.join(directory, 'chat_config.journal'),
+        snapshot_path=os.path.join(directory, 'chat_config.snapshot.json'),
+        legacy_path=None,
+        compact_bytes=compact_bytes,
+        flush_interval=3600,
+        flush_threshold=10 ** 9,
+    )
+
+
+def populate(store):
+    rng = random.Random(0)
+    store.load()
+    start = time.perf_counter()
+    for chat_id in range(CHATS):
+        store.save(str(chat_id), default_chat_config())
+    for _ in range(MUTATIONS_PER_CHAT):
+        for chat_id in range(CHATS):
+            config = store.configs[str(chat_id)]
+            config["last_quiz_id"] = rng.randrange(10 ** 9)
+            store.save(str(chat_id), config)
+    elapsed = time.perf_counter() - start
+    writes = CHATS * (MUTATIONS_PER_CHAT + 1)
+    print(f"appended {writes} mutations in {elapsed:.2f}s ({writes / elapsed:,.0f}/s)")
+
+
+def recover(directory, label):
+    store = open_store(directory, 10 ** 12)
+    start = time.perf_counter()
+    configs = store.load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(configs):>8} chats {store.stats['replayed_records']:>9} records {elapsed:>8.2f}s")
+    store.journal.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory, 10 ** 12)
+        populate(store)
+        # Simulate a crash: the journal is on disk, no snapshot was ever written.
+        store.journal.close()
+        size = os.path.getsize(os.path.join(directory, 'chat_config.journal'))
+        print(f"journal size {size / 1e6:.1f} MB")
+        recover(directory, "journal replay only")
+
+        store = open_store(directory, 0)
+        store.load()
+        store.save("0", dict(store.configs["0"], active=False))
+        store.flush()
+        store.journal.close()
+        size = os.path.getsize(os.path.join(directory, 'chat_config.snapshot.json'))
+        print(f"snapshot size {size / 1e6:.1f} MB")
+        recover(directory, "snapshot after compaction")
+
+
+if __name__ == '__main__':
+    main()
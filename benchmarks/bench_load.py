@@ -0,0 +1,168 @@
+"""Offline load test: main.py against a fake Bot API with N synthetic groups.
+
+Seeds a JSON chat store with N active groups (each with a previous quiz to
+delete), boots main.py against benchmarks/fake_telegram.py with a short quiz
+interval, and watches one full interval of scheduled quizzes. Reports sendPoll
+throughput, the lag from each chat's scheduled slot to its sendPoll reaching
+the fake API, the bot's CPU time and its RSS (read from /proc, so Linux only).
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.bench_load --groups 10000 --interval 60 --latency 0.05 --flood-rate 0.01
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.bench_webhook_latency import ROOT, free_port
+from benchmarks.fake_telegram import FakeTelegram
+from scheduler import quiz_phase
+
+TIMEOUT = 60
+TICK = 1.0
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def seed_chats(workdir, groups):
+    chats = {}
+    for i in range(groups):
+        chats[str(-1_000_000_000_000 - i)] = {
+            "language": "English", "auto_delete": True, "auto_pin": False, "last_quiz_id": 1, "active": True,
+        }
+    with open(os.path.join(workdir, "chat_config.json"), "w", encoding="utf-8") as f:
+        json.dump(chats, f)
+    return [int(chat_id) for chat_id in chats]
+
+
+def boot_bot(fake, workdir, args):
+    port = free_port()
+    env = dict(
+        os.environ,
+        TELEGRAM_BOT_TOKEN="123456:ABCDEF",
+        TELEGRAM_API_URL=fake.url,
+        PORT=str(port),
+        CHAT_STORE="json",
+        QUIZ_INTERVAL=str(args.interval),
+        GLOBAL_RATE_LIMIT=str(args.global_rate),
+        CHAT_RATE_LIMIT=str(args.chat_rate),
+    )
+    shutil.copy(os.path.join(ROOT, "questions.json"), workdir)
+    bot = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "main.py")],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return bot, port
+
+
+def wait_ready(bot, port):
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if bot.poll() is not None:
+            raise RuntimeError(f"bot exited with {bot.returncode} during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("bot did not become ready")
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def lag_seconds(chat_id, sent_at, interval):
+    # The dispatcher fires a chat at the start of the tick slot holding its phase.
+    due_offset = int(quiz_phase(chat_id, interval) / TICK) * TICK
+    return (sent_at - due_offset) % interval
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(args):
+    fake = FakeTelegram(latency=args.latency, error_rate=args.error_rate, flood_rate=args.flood_rate,
+                        retry_after=args.retry_after).start()
+    # Turns the fake's perf_counter stamps into wall-clock time, which phases are based on.
+    wall_offset = time.time() - time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        chat_ids = set(seed_chats(workdir, args.groups))
+        bot, port = boot_bot(fake, workdir, args)
+        try:
+            wait_ready(bot, port)
+            with fake.lock:
+                fake.calls.clear()
+                fake.statuses.clear()
+            cpu_start = cpu_seconds(bot.pid)
+            start = time.perf_counter()
+            peak_rss = 0.0
+            while time.perf_counter() - start < args.interval + args.grace:
+                peak_rss = max(peak_rss, rss_mb(bot.pid))
+                time.sleep(0.5)
+            window = time.perf_counter() - start
+            cpu = cpu_seconds(bot.pid) - cpu_start
+            with fake.lock:
+                calls = list(fake.calls)
+                statuses = dict(fake.statuses)
+        finally:
+            bot.send_signal(signal.SIGTERM)
+            bot.wait(TIMEOUT)
+            fake.stop()
+
+    polls = {}
+    for received_at, method, chat_id in calls:
+        if method == "sendPoll" and chat_id in chat_ids:
+            polls.setdefault(chat_id, received_at)
+    lags = sorted(lag_seconds(chat_id, received_at + wall_offset, args.interval) for chat_id, received_at in polls.items())
+    print(f"{args.groups} groups, {args.interval}s interval, {args.latency * 1000:.0f} ms latency, "
+          f"{args.error_rate:.1%} errors, {args.flood_rate:.1%} 429s")
+    print(f"quizzes sent     {len(polls):>9}/{args.groups}")
+    print(f"sendPoll/s       {len(polls) / window:>9.1f}")
+    print(f"API calls/s      {sum(statuses.values()) / window:>9.1f}")
+    if lags:
+        print(f"lag p50 s        {statistics.median(lags):>9.2f}")
+        print(f"lag p99 s        {percentile(lags, 0.99):>9.2f}")
+        print(f"lag max s        {lags[-1]:>9.2f}")
+    print(f"bot CPU s        {cpu:>9.2f} ({cpu / window:.0%} of one core)")
+    print(f"bot peak RSS MB  {peak_rss:>9.1f}")
+    for (method, status), count in sorted(statuses.items()):
+        print(f"  {method:<16} {status} x{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=1000)
+    parser.add_argument("--interval", type=int, default=30, help="QUIZ_INTERVAL for the run, in seconds")
+    parser.add_argument("--grace", type=float, default=10, help="seconds to keep watching after one interval")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every outbound API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of outbound calls answered with 500")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="fraction of outbound calls answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--global-rate", type=float, default=100000, help="GLOBAL_RATE_LIMIT for the bot")
+    parser.add_argument("--chat-rate", type=float, default=20, help="CHAT_RATE_LIMIT for the bot")
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Startup time, memory and pick cost, JSON bank vs. the memory-mapped questions.bin.
+
+Each bank is loaded in a fresh process, which reports how long loading took,
+its RSS growth, and how many pick-and-decode operations it manages per second.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_question_bank_mmap
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_question_memory import rss_bytes, write_bank
+
+SIZES = [2_000, 100_000, 1_000_000]
+MIN_SECONDS = 1.0
+
+
+def measure(engine, json_path, bank_path):
+    import logging
+    logging.disable(logging.CRITICAL)
+    from question_bank import load_questions, map_question_bank, pick_question_id
+    before = rss_bytes()
+    start = time.perf_counter()
+    index = load_questions(json_path) if engine == "json" else map_question_bank(bank_path)
+    load_seconds = time.perf_counter() - start
+    retained = rss_bytes() - before
+    questions = index["questions"]
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        question = questions[pick_question_id(index)]
+        list(question.options)
+        count += 1
+    return load_seconds, retained, count / (time.perf_counter() - start)
+
+
+def main():
+    from question_bank import compile_question_bank, load_questions
+    context = multiprocessing.get_context("spawn")
+    print(f"{'questions':>10} {'engine':>7} {'load s':>9} {'RSS MB':>8} {'picks/s':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            json_path = os.path.join(workdir, f"bank_{size}.json")
+            bank_path = os.path.join(workdir, f"bank_{size}.bin")
+            write_bank(json_path, size)
+            compile_question_bank(load_questions(json_path), bank_path)
+            for engine in ("json", "mmap"):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    load_seconds, retained, picks = pool.submit(measure, engine, json_path, bank_path).result()
+                print(f"{size:>10} {engine:>7} {load_seconds:>9.4f} {retained / 1e6:>8.1f} {picks:>10.0f}")
+            os.remove(json_path)
+            os.remove(bank_path)
+
+
+if __name__ == '__main__':
+    main()
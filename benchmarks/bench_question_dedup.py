@@ -0,0 +1,64 @@
+"""Near-duplicate clustering time and memory as the question bank grows.
+
+Builds a synthetic bank by drawing questions from questions.json and
+rewording a few words of each, so every size carries a realistic share of
+near-duplicates, then times signing (minhash_signature) and clustering
+(cluster_signatures) separately and reports the RSS growth of the pass.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_question_dedup
+"""
+import gc
+import json
+import random
+import time
+
+from question_dedup import cluster_signatures, minhash_signature, question_words
+
+SIZES = [2_000, 100_000, 1_000_000]
+FILLER = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike".split()
+
+
+def base_questions():
+    with open('questions.json', 'r', encoding='utf-8') as f:
+        return [q for q in json.load(f) if isinstance(q, dict) and "question" in q and "options" in q]
+
+
+def synthetic_words(base, size, seed=0):
+    rng = random.Random(seed)
+    for i in range(size):
+        q = rng.choice(base)
+        words = question_words(q["question"], q["options"])
+        # Two fresh words per question: distinct questions, same cluster as their source.
+        words.update((f"{rng.choice(FILLER)}{i}", f"{rng.choice(FILLER)}{i // 2}"))
+        yield words
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def main():
+    base = base_questions()
+    print(f"{'questions':>10} {'sign s':>8} {'cluster s':>10} {'clusters':>9} {'RSS MB':>8}")
+    for size in SIZES:
+        gc.collect()
+        before = rss_mb()
+        start = time.perf_counter()
+        signatures = [minhash_signature(words) for words in synthetic_words(base, size)]
+        signed = time.perf_counter() - start
+        start = time.perf_counter()
+        cluster_ids = cluster_signatures(signatures)
+        clustered = time.perf_counter() - start
+        grown = rss_mb() - before
+        print(f"{size:>10} {signed:>8.2f} {clustered:>10.2f} {len(set(cluster_ids)):>9} {grown:>8.1f}")
+        del signatures, cluster_ids
+
+
+if __name__ == '__main__':
+    main()
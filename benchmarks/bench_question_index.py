@@ -0,0 +1,70 @@
+"""Sends per second of the question-picking path, legacy filter vs. prebuilt index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_question_index
+"""
+import json
+import random
+import time
+
+from question_bank import build_question_index, pick_question_id
+
+SIZES = [2_000, 50_000, 500_000]
+MIN_SECONDS = 1.0
+
+
+def synthetic_bank(size, seed=0):
+    with open('questions.json', 'r', encoding='utf-8') as f:
+        base = [q for q in json.load(f) if isinstance(q, dict) and "question" in q and "options" in q]
+    rng = random.Random(seed)
+    bank = []
+    for i in range(size):
+        q = rng.choice(base)
+        question = f"{q['question']} (#{i})"
+        if i % 50 == 0:
+            question = " ".join(["long"] * 120)
+        bank.append({"question": question, "options": list(q["options"]), "answer": q.get("answer", "A")})
+    return bank
+
+
+def legacy_send(questions):
+    # The pre-index get_valid_random_question() + send_quiz() preparation.
+    valid_questions = [q for q in questions if len(q["question"].split()) <= 100]
+    question_data = random.choice(valid_questions)
+    safe_options = [opt if len(opt) <= 100 else opt[:100] for opt in question_data["options"]]
+    mapping = {"A": 0, "B": 1, "C": 2, "D": 3}
+    correct_option_id = mapping.get(question_data.get("answer", "A").upper(), 0)
+    return question_data["question"], safe_options, correct_option_id
+
+
+def indexed_send(index):
+    question = index["questions"][pick_question_id(index)]
+    return question.question, list(question.options), question.correct_option_id
+
+
+def sends_per_second(fn, arg):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        fn(arg)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return count / elapsed
+
+
+def main():
+    print(f"{'questions':>10} {'build (s)':>10} {'legacy/s':>12} {'indexed/s':>12} {'speedup':>10}")
+    for size in SIZES:
+        bank = synthetic_bank(size)
+        start = time.perf_counter()
+        index = build_question_index(bank)
+        build_seconds = time.perf_counter() - start
+        legacy = sends_per_second(legacy_send, bank)
+        indexed = sends_per_second(indexed_send, index)
+        print(f"{size:>10} {build_seconds:>10.3f} {legacy:>12.1f} {indexed:>12.1f} {indexed / legacy:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Memory and load time of the question bank, parsed dicts vs. slotted records.
+
+Each bank is written to a temporary JSON file and loaded in a fresh process,
+which reports its RSS growth once the load is done and the time it took. The
+dicts row rebuilds the pre-record index: the parsed list of dicts plus
+per-question safe_options, correct_option_ids and word_counts lists.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_question_memory
+"""
+import gc
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SIZES = [2_000, 100_000, 1_000_000]
+
+
+def write_bank(path, size, seed=0):
+    with open('questions.json', 'r', encoding='utf-8') as f:
+        base = [q for q in json.load(f) if isinstance(q, dict) and "question" in q and "options" in q]
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for i in range(size):
+            q = rng.choice(base)
+            record = {"question": f"{q['question']} (#{i})", "options": q["options"], "answer": q.get("answer", "A")}
+            f.write(("," if i else "") + json.dumps(record, ensure_ascii=False))
+        f.write("]")
+
+
+def rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def load_dicts(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        questions = [q for q in json.load(f) if isinstance(q, dict) and "question" in q and "options" in q]
+    mapping = {"A": 0, "B": 1, "C": 2, "D": 3}
+    word_counts = [len(q["question"].split()) for q in questions]
+    return {
+        "questions": questions,
+        "eligible_ids": [i for i, count in enumerate(word_counts) if count <= 100],
+        "word_counts": word_counts,
+        "safe_options": [[opt[:100] for opt in q["options"]] for q in questions],
+        "correct_option_ids": [mapping.get(q.get("answer", "A").upper(), 0) for q in questions],
+    }
+
+
+def load_records(path):
+    from question_bank import load_questions
+    return load_questions(path)
+
+
+def measure(engine, path):
+    import logging
+    logging.disable(logging.CRITICAL)
+    load = load_dicts if engine == "dicts" else load_records
+    gc.collect()
+    before = rss_bytes()
+    start = time.perf_counter()
+    index = load(path)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = rss_bytes() - before
+    return len(index["questions"]), retained, elapsed
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    print(f"{'questions':>10} {'engine':>8} {'RSS MB':>9} {'load s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            path = os.path.join(workdir, f"bank_{size}.json")
+            write_bank(path, size)
+            for engine in ("dicts", "records"):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    count, retained, elapsed = pool.submit(measure, engine, path).result()
+                print(f"{count:>10} {engine:>8} {retained / 1e6:>9.1f} {elapsed:>8.2f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Peak memory and load time, whole-file json.load vs. the streaming loader.
+
+Each bank is loaded in a fresh process, which reports its peak RSS growth
+(VmHWM) and the load time. The json.load row is the previous loader: the whole
+text read at once, records built by an object_hook. The streaming rows read
+the same bank as a JSON array and as JSON Lines.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_question_stream
+"""
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_question_memory import write_bank
+
+SIZES = [100_000, 1_000_000]
+
+
+def peak_rss_bytes():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def load_whole(path):
+    from question_bank import Question, build_question_index, is_valid_question
+
+    def hook(q):
+        return Question.from_dict(q) if is_valid_question(q) else q
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f, object_hook=hook)
+    return build_question_index([q for q in data if isinstance(q, Question)])
+
+
+def measure(engine, path):
+    import logging
+    logging.disable(logging.CRITICAL)
+    from question_bank import load_questions
+    before = peak_rss_bytes()
+    start = time.perf_counter()
+    index = load_whole(path) if engine == "json.load" else load_questions(path)
+    elapsed = time.perf_counter() - start
+    return len(index["questions"]), peak_rss_bytes() - before, elapsed
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    print(f"{'questions':>10} {'loader':>16} {'peak MB':>9} {'load s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            json_path = os.path.join(workdir, f"bank_{size}.json")
+            lines_path = os.path.join(workdir, f"bank_{size}.jsonl")
+            write_bank(json_path, size)
+            with open(json_path, 'r', encoding='utf-8') as src, open(lines_path, 'w', encoding='utf-8') as dst:
+                for record in json.load(src):
+                    dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+            for engine, path in (("json.load", json_path), ("stream array", json_path), ("stream lines", lines_path)):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    count, peak, elapsed = pool.submit(measure, engine, path).result()
+                print(f"{count:>10} {engine:>16} {peak / 1e6:>9.1f} {elapsed:>8.2f}")
+            os.remove(json_path)
+            os.remove(lines_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Peak quiz sends per second for N chats, legacy first=0 vs. staggered phases.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_schedule_spread
+"""
+import random
+from collections import Counter
+
+from scheduler import QUIZ_INTERVAL, quiz_phase
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def supergroup_ids(count, rng):
+    return [-1_000_000_000_000 - rng.randrange(10 ** 10) for _ in range(count)]
+
+
+def sequential_ids(count, rng):
+    start = -1_001_500_000_000 - rng.randrange(10 ** 6)
+    return list(range(start, start - count, -1))
+
+
+def peak_per_second(chat_ids):
+    bins = Counter(int(quiz_phase(chat_id)) for chat_id in chat_ids)
+    return max(bins.values())
+
+
+def main():
+    rng = random.Random(0)
+    print(f"interval {QUIZ_INTERVAL}s")
+    print(f"{'chats':>9} {'ideal/s':>9} {'legacy/s':>10} {'random ids/s':>13} {'sequential ids/s':>17}")
+    for size in SIZES:
+        ideal = size / QUIZ_INTERVAL
+        # Legacy: every chat is scheduled with first=0, so they all fire in the first second.
+        legacy = size
+        random_peak = peak_per_second(supergroup_ids(size, rng))
+        sequential_peak = peak_per_second(sequential_ids(size, rng))
+        print(f"{size:>9} {ideal:>9.1f} {legacy:>10} {random_peak:>13} {sequential_peak:>17}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""End-to-end update latency, webhook vs. long polling, against a fake Bot API.
+
+Boots main.py against benchmarks/fake_telegram.py, sends /start from N
+synthetic private chats and measures the time from the update leaving the fake
+Telegram to the bot's reply arriving back at it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_webhook_latency
+"""
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_telegram import FakeTelegram, start_update
+
+UPDATES = 500
+RATE = 100
+TIMEOUT = 60
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def boot_bot(fake, mode, workdir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        TELEGRAM_BOT_TOKEN="123456:ABCDEF",
+        TELEGRAM_API_URL=fake.url,
+        BOT_MODE=mode,
+        PORT=str(port),
+        WEBHOOK_URL=f"http://127.0.0.1:{port}",
+        WEBHOOK_SECRET="bench-secret",
+        CHAT_STORE="json",
+        # Measure ingestion, not our own outbound throttling.
+        GLOBAL_RATE_LIMIT="100000",
+    )
+    shutil.copy(os.path.join(ROOT, "questions.json"), workdir)
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "main.py")],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(fake, mode):
+    ready = fake.webhook_set if mode == "webhook" else fake.polling
+    if not ready.wait(TIMEOUT):
+        raise RuntimeError(f"bot did not come up in {mode} mode")
+    if mode == "webhook":
+        # Retry the first POST until the bot's web server answers.
+        deadline = time.monotonic() + TIMEOUT
+        while True:
+            try:
+                fake.post_webhook(start_update(0, 1))
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+
+def run(mode):
+    fake = FakeTelegram().start()
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = boot_bot(fake, mode, workdir)
+        try:
+            wait_ready(fake, mode)
+            time.sleep(0.5)
+            sent = {}
+            start = time.perf_counter()
+            for i in range(UPDATES):
+                chat_id = 100_000 + i
+                sent[chat_id] = fake.push_update(start_update, chat_id)
+                time.sleep(max(0.0, start + (i + 1) / RATE - time.perf_counter()))
+            deadline = time.monotonic() + TIMEOUT
+            replies = {}
+            while len(replies) < UPDATES and time.monotonic() < deadline:
+                with fake.lock:
+                    for received_at, method, chat_id in fake.calls:
+                        if method == "sendMessage" and chat_id in sent:
+                            replies.setdefault(chat_id, received_at)
+                time.sleep(0.05)
+        finally:
+            bot.send_signal(signal.SIGTERM)
+            bot.wait(TIMEOUT)
+            fake.stop()
+    latencies = sorted((replies[chat_id] - sent[chat_id]) * 1000 for chat_id in replies)
+    if not latencies:
+        print(f"{mode:>8} no replies received")
+        return
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{mode:>8} {len(latencies):>8}/{UPDATES} {statistics.median(latencies):>9.1f} {p99:>9.1f} {latencies[-1]:>9.1f}")
+
+
+def main():
+    print(f"{UPDATES} /start updates at {RATE}/s")
+    print(f"{'mode':>8} {'replied':>12} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for mode in ("polling", "webhook"):
+        run(mode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""A local stand-in for the Telegram Bot API, for offline benchmarks.
+
+It answers the Bot API methods the bot uses, records every call with a
+timestamp, and feeds synthetic updates to the bot either through getUpdates
+(long polling) or by POSTing them to the bot's webhook. Outbound methods can be
+slowed down by a fixed latency, fail with a 500 at error_rate, or answer 429
+with retry_after at flood_rate.
+"""
+import json
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "ThinkChessy", "username": "ThinkChessyBot"}
+# Methods that take latency, errors and floods; the plumbing ones always answer at once.
+FAULTY_METHODS = {"sendPoll", "sendMessage", "deleteMessage", "deleteMessages", "pinChatMessage", "getChatMember"}
+
+
+def parse_params(content_type, body):
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    params = {}
+    for key, values in parse_qs(body.decode("utf-8")).items():
+        value = values[0]
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def start_update(update_id, chat_id, chat_type="private"):
+    chat = {"id": chat_id, "type": chat_type}
+    if chat_type == "private":
+        chat["first_name"] = "Load"
+    else:
+        chat["title"] = f"Load group {chat_id}"
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": {"id": abs(chat_id), "is_bot": False, "first_name": "Load"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+class FakeTelegram:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, flood_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Condition()
+        self.calls = []
+        self.statuses = {}
+        self.pending_updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.polling = threading.Event()
+        self.webhook_set = threading.Event()
+        self.webhook_pool = ThreadPoolExecutor(max_workers=32)
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.webhook_pool.shutdown(wait=False)
+
+    # ----------------------------- Updates ----------------------------- #
+
+    def push_update(self, make_update, *args):
+        with self.lock:
+            update = make_update(self.next_update_id, *args)
+            self.next_update_id += 1
+            sent_at = time.perf_counter()
+            if self.webhook_url is None:
+                self.pending_updates.append(update)
+                self.lock.notify_all()
+                return sent_at
+        self.webhook_pool.submit(self.post_webhook, update)
+        return sent_at
+
+    def post_webhook(self, update):
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=json.dumps(update).encode("utf-8"),
+            headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": self.webhook_secret or ""},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+    def get_updates(self, params):
+        offset = params.get("offset") or 0
+        deadline = time.monotonic() + float(params.get("timeout") or 0)
+        with self.lock:
+            self.pending_updates = [u for u in self.pending_updates if u["update_id"] >= offset]
+            while not self.pending_updates and time.monotonic() < deadline:
+                self.lock.wait(deadline - time.monotonic())
+            return list(self.pending_updates[:params.get("limit") or 100])
+
+    # ----------------------------- Bot API ----------------------------- #
+
+    def message(self, chat_id, **fields):
+        with self.lock:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+        return dict({"message_id": message_id, "date": int(time.time()), "chat": {"id": chat_id, "type": "supergroup"}}, **fields)
+
+    def fault(self, method):
+        # (status, body) for an injected failure, or None to answer normally.
+        if method not in FAULTY_METHODS:
+            return None
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.flood_rate:
+            return 429, {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {self.retry_after}",
+                         "parameters": {"retry_after": self.retry_after}}
+        if roll < self.flood_rate + self.error_rate:
+            return 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}
+        return None
+
+    def answer(self, method, params):
+        if method == "getMe":
+            return BOT_USER
+        if method == "getUpdates":
+            self.polling.set()
+            return self.get_updates(params)
+        if method == "setWebhook":
+            with self.lock:
+                self.webhook_url = params["url"]
+                self.webhook_secret = params.get("secret_token")
+            self.webhook_set.set()
+            return True
+        if method == "deleteWebhook":
+            with self.lock:
+                self.webhook_url = None
+            return True
+        if method == "getChatMember":
+            user = BOT_USER if params.get("user_id") == BOT_USER["id"] else {"id": params.get("user_id"), "is_bot": False, "first_name": "Load"}
+            return {"status": "creator", "user": user, "is_anonymous": False}
+        if method == "sendMessage":
+            return self.message(params["chat_id"], text=params.get("text", ""))
+        if method in ("deleteMessage", "deleteMessages", "pinChatMessage"):
+            return True
+        if method == "sendPoll":
+            return self.message(params["chat_id"], poll={
+                "id": "1", "question": params["question"], "total_voter_count": 0, "is_closed": False,
+                "is_anonymous": False, "type": "quiz", "allows_multiple_answers": False,
+                "options": [{"text": text, "voter_count": 0} for text in params["options"]],
+            })
+        return True
+
+    def handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                params = parse_params(self.headers.get("Content-Type", ""), self.rfile.read(length))
+                method = self.path.rsplit("/", 1)[-1]
+                received_at = time.perf_counter()
+                status, response = fake.fault(method) or (200, None)
+                if response is None:
+                    response = {"ok": True, "result": fake.answer(method, params)}
+                if method not in ("getUpdates", "getMe"):
+                    with fake.lock:
+                        if status == 200:
+                            fake.calls.append((received_at, method, params.get("chat_id")))
+                        fake.statuses[(method, status)] = fake.statuses.get((method, status), 0) + 1
+                body = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
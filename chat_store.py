@@ -0,0 +1,478 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Event, Lock, Thread
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = 'chat_config.json'
+CONFIG_DB_FILE = 'chat_config.db'
+CONFIG_FLUSH_INTERVAL = float(os.environ.get("CONFIG_FLUSH_INTERVAL", 5))
+CONFIG_FLUSH_THRESHOLD = int(os.environ.get("CONFIG_FLUSH_THRESHOLD", 1000))
+
+FLUSH_SECONDS = REGISTRY.histogram("quizbot_chat_config_flush_seconds", "Time to write dirty chat configs to the store.")
+FLUSH_BYTES = REGISTRY.counter("quizbot_chat_config_bytes_written_total", "Bytes written by chat config flushes.")
+FLUSH_ERRORS = REGISTRY.counter("quizbot_chat_config_flush_errors_total", "Chat config flushes that failed.")
+
+def default_chat_config():
+    return {
+        "language": "English",
+        "auto_delete": True,
+        "auto_pin": False,
+        "last_quiz_id": None,
+        "active": True
+    }
+
+# ----------------------------- Storage Interface ----------------------------- #
+# A store owns persistence for chat configs. Mutations only mark a chat dirty;
+# a background flusher writes them out at most once per CONFIG_FLUSH_INTERVAL
+# (or sooner once CONFIG_FLUSH_THRESHOLD chats are dirty). Backends implement
+# load(), get(), active_chat_ids(), chat_counts() and write(), which receives
+# the dirty chats.
+
+class ChatConfigStore:
+    name = "base"
+
+    def __init__(self, flush_interval=CONFIG_FLUSH_INTERVAL, flush_threshold=CONFIG_FLUSH_THRESHOLD):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.dirty = {}
+        self.lock = Lock()
+        self.flush_lock = Lock()
+        self.flush_requested = Event()
+        self.stopped = Event()
+        self.flusher = None
+        self.stats = {
+            "flushes": 0,
+            "flush_errors": 0,
+            "bytes_written": 0,
+            "chats_flushed": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+    def load(self):
+        raise NotImplementedError
+
+    def get(self, chat_id: str):
+        raise NotImplementedError
+
+    def active_chat_ids(self):
+        raise NotImplementedError
+
+    def chat_counts(self):
+        # (active, inactive)
+        raise NotImplementedError
+
+    def write(self, dirty):
+        raise NotImplementedError
+
+    def save(self, chat_id: str, config):
+        with self.lock:
+            self.dirty[chat_id] = config
+            if len(self.dirty) >= self.flush_threshold:
+                self.flush_requested.set()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                dirty, self.dirty = self.dirty, {}
+            start = time.perf_counter()
+            try:
+                written = self.write(dirty)
+            except Exception as e:
+                logger.error(f"Failed to save chat config: {e}")
+                self.stats["flush_errors"] += 1
+                FLUSH_ERRORS.inc()
+                with self.lock:
+                    for chat_id, config in dirty.items():
+                        self.dirty.setdefault(chat_id, config)
+                return
+            elapsed = time.perf_counter() - start
+            self.stats["flushes"] += 1
+            self.stats["bytes_written"] += written
+            self.stats["chats_flushed"] += len(dirty)
+            self.stats["last_flush_seconds"] = elapsed
+            self.stats["max_flush_seconds"] = max(self.stats["max_flush_seconds"], elapsed)
+            self.stats["total_flush_seconds"] += elapsed
+            FLUSH_SECONDS.observe(elapsed)
+            FLUSH_BYTES.inc(written)
+
+    def run_flusher(self):
+        while not self.stopped.is_set():
+            self.flush_requested.wait(self.flush_interval)
+            self.flush_requested.clear()
+            self.flush()
+
+    def start(self):
+        self.flusher = Thread(target=self.run_flusher, name="chat-config-flusher", daemon=True)
+        self.flusher.start()
+        atexit.register(self.close)
+
+    def close(self):
+        self.stopped.set()
+        self.flush_requested.set()
+        self.flush()
+
+# ----------------------------- JSON File Backend ----------------------------- #
+
+class JsonChatConfigStore(ChatConfigStore):
+    name = "json"
+
+    def __init__(self, path=CONFIG_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.configs = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.configs = json.load(f)
+                logger.info("Chat configuration loaded from file.")
+            except Exception as e:
+                logger.error(f"Failed to load chat config: {e}")
+                self.configs = {}
+        return self.configs
+
+    def get(self, chat_id: str):
+        return self.configs.get(chat_id)
+
+    def active_chat_ids(self):
+        return [int(chat_id) for chat_id, config in list(self.configs.items()) if config.get("active", True)]
+
+    def chat_counts(self):
+        active = sum(1 for config in list(self.configs.values()) if config.get("active", True))
+        return active, len(self.configs) - active
+
+    def save(self, chat_id: str, config):
+        self.configs[chat_id] = config
+        super().save(chat_id, config)
+
+    def write(self, dirty):
+        while True:
+            try:
+                data = json.dumps(self.configs).encode('utf-8')
+                break
+            except RuntimeError:
+                # A handler added a key mid-serialisation; take a fresh snapshot.
+                continue
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        return len(data)
+
+# ----------------------------- SQLite Backend ----------------------------- #
+# One row per chat, so a flush upserts only the dirty rows in one transaction.
+# Keys without a dedicated column (rotation state and the like) go to `extra`.
+
+SQLITE_COLUMNS = ("language", "auto_delete", "auto_pin", "last_quiz_id", "active")
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id INTEGER PRIMARY KEY,
+    language TEXT NOT NULL DEFAULT 'English',
+    auto_delete INTEGER NOT NULL DEFAULT 1,
+    auto_pin INTEGER NOT NULL DEFAULT 0,
+    last_quiz_id INTEGER,
+    active INTEGER NOT NULL DEFAULT 1,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS chats_active ON chats (active);
+"""
+SQLITE_UPSERT = (
+    "INSERT INTO chats (chat_id, language, auto_delete, auto_pin, last_quiz_id, active, extra) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (chat_id) DO UPDATE SET language = excluded.language, auto_delete = excluded.auto_delete, "
+    "auto_pin = excluded.auto_pin, last_quiz_id = excluded.last_quiz_id, active = excluded.active, "
+    "extra = excluded.extra"
+)
+SQLITE_SELECT = "SELECT language, auto_delete, auto_pin, last_quiz_id, active, extra FROM chats WHERE chat_id = ?"
+SQLITE_SELECT_ACTIVE = "SELECT chat_id FROM chats WHERE active = 1"
+SQLITE_COUNT = "SELECT active, COUNT(*) FROM chats GROUP BY active"
+
+def _row_to_config(row):
+    language, auto_delete, auto_pin, last_quiz_id, active, extra = row
+    config = json.loads(extra)
+    config.update({
+        "language": language,
+        "auto_delete": bool(auto_delete),
+        "auto_pin": bool(auto_pin),
+        "last_quiz_id": last_quiz_id,
+        "active": bool(active),
+    })
+    return config
+
+def _config_to_row(chat_id: str, config):
+    defaults = default_chat_config()
+    extra = json.dumps({k: v for k, v in list(config.items()) if k not in SQLITE_COLUMNS})
+    return (
+        int(chat_id),
+        config.get("language", defaults["language"]),
+        int(bool(config.get("auto_delete", defaults["auto_delete"]))),
+        int(bool(config.get("auto_pin", defaults["auto_pin"]))),
+        config.get("last_quiz_id"),
+        int(bool(config.get("active", defaults["active"]))),
+        extra,
+    )
+
+class SqliteChatConfigStore(ChatConfigStore):
+    name = "sqlite"
+
+    def __init__(self, path=CONFIG_DB_FILE, legacy_path=CONFIG_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.legacy_path = legacy_path
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=16)
+        self.conn_lock = Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def load(self):
+        self.migrate_legacy_json()
+        return {}
+
+    def migrate_legacy_json(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with self.conn_lock:
+            if self.conn.execute("SELECT 1 FROM chats LIMIT 1").fetchone():
+                return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read {self.legacy_path} for migration: {e}")
+            return
+        with self.conn_lock, self.conn:
+            self.conn.executemany(SQLITE_UPSERT, [_config_to_row(chat_id, config) for chat_id, config in legacy.items()])
+        os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+        logger.info(f"Migrated {len(legacy)} chats from {self.legacy_path} to {self.path}.")
+
+    def get(self, chat_id: str):
+        with self.conn_lock:
+            row = self.conn.execute(SQLITE_SELECT, (int(chat_id),)).fetchone()
+        return _row_to_config(row) if row else None
+
+    def active_chat_ids(self):
+        with self.conn_lock:
+            return [chat_id for (chat_id,) in self.conn.execute(SQLITE_SELECT_ACTIVE)]
+
+    def chat_counts(self):
+        with self.conn_lock:
+            counts = dict(self.conn.execute(SQLITE_COUNT).fetchall())
+        return counts.get(1, 0), counts.get(0, 0)
+
+    def write(self, dirty):
+        rows = [_config_to_row(chat_id, config) for chat_id, config in dirty.items()]
+        with self.conn_lock, self.conn:
+            self.conn.executemany(SQLITE_UPSERT, rows)
+        return sum(len(row[1]) + len(row[6]) + 32 for row in rows)
+
+    def close(self):
+        super().close()
+        with self.conn_lock:
+            self.conn.close()
+
+# ----------------------------- Journal Backend ----------------------------- #
+# Every save appends only the fields that changed ("set" records, or one "put"
+# for a new chat) to an append-only journal, so a mutation costs O(1) bytes and
+# is in the OS page cache before save() returns. The flusher fsyncs the journal
+# and, once it outgrows JOURNAL_COMPACT_BYTES, writes a snapshot of the whole
+# state and swaps in a journal of only the records it does not cover. Records
+# carry a sequence number and the snapshot records the last one it covers, and
+# both files are replaced by fsynced renames, so a crash at any point restarts
+# from the same state.
+
+JOURNAL_FILE = 'chat_config.journal'
+SNAPSHOT_FILE = 'chat_config.snapshot.json'
+JOURNAL_COMPACT_BYTES = int(os.environ.get("JOURNAL_COMPACT_BYTES", 16 * 1024 * 1024))
+
+def fsync_dir(path):
+    # A rename is only durable once the directory holding it is synced.
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class JournalChatConfigStore(ChatConfigStore):
+    name = "journal"
+
+    def __init__(self, journal_path=JOURNAL_FILE, snapshot_path=SNAPSHOT_FILE, legacy_path=CONFIG_FILE,
+                 compact_bytes=JOURNAL_COMPACT_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.legacy_path = legacy_path
+        self.compact_bytes = compact_bytes
+        self.configs = {}
+        self.persisted = {}
+        self.seq = 0
+        self.journal = None
+        self.journal_bytes = 0
+        self.unsynced_bytes = 0
+        self.stats["compactions"] = 0
+        self.stats["replayed_records"] = 0
+
+    def load(self):
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot["seq"]
+            self.configs = snapshot["chats"]
+        elif not os.path.exists(self.journal_path) and self.legacy_path and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                self.configs = json.load(f)
+            # The seed must be on disk before the journal exists, or the next
+            # start would replay the journal without it.
+            self.write_snapshot(0, self.configs)
+            os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+            logger.info(f"Migrated {len(self.configs)} chats from {self.legacy_path} to {self.snapshot_path}.")
+        self.seq = snapshot_seq
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                good_bytes = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("missing newline")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn tail from a crash mid-append; cut it off so new records start clean.
+                        logger.warning("Dropping truncated record at the end of the chat journal.")
+                        f.truncate(good_bytes)
+                        break
+                    good_bytes += len(line)
+                    if record["s"] <= snapshot_seq:
+                        continue
+                    if record["op"] == "put":
+                        self.configs[record["c"]] = record["v"]
+                    else:
+                        self.configs.setdefault(record["c"], default_chat_config())[record["k"]] = record["v"]
+                    self.seq = record["s"]
+                    replayed += 1
+        self.stats["replayed_records"] = replayed
+        self.persisted = {chat_id: dict(config) for chat_id, config in self.configs.items()}
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.journal_bytes = self.journal.tell()
+        logger.info(f"Chat configuration restored from snapshot and {replayed} journal records.")
+        return self.configs
+
+    def get(self, chat_id: str):
+        return self.configs.get(chat_id)
+
+    def active_chat_ids(self):
+        return [int(chat_id) for chat_id, config in list(self.configs.items()) if config.get("active", True)]
+
+    def chat_counts(self):
+        active = sum(1 for config in list(self.configs.values()) if config.get("active", True))
+        return active, len(self.configs) - active
+
+    def save(self, chat_id: str, config):
+        with self.lock:
+            self.configs[chat_id] = config
+            previous = self.persisted.get(chat_id)
+            lines = []
+            if previous is None:
+                self.seq += 1
+                lines.append(json.dumps({"s": self.seq, "op": "put", "c": chat_id, "v": config}))
+            else:
+                for key, value in list(config.items()):
+                    if key not in previous or previous[key] != value:
+                        self.seq += 1
+                        lines.append(json.dumps({"s": self.seq, "op": "set", "c": chat_id, "k": key, "v": value}))
+            if not lines:
+                return
+            self.persisted[chat_id] = dict(config)
+            data = "\n".join(lines) + "\n"
+            self.journal.write(data)
+            self.journal.flush()
+            self.journal_bytes += len(data)
+            self.unsynced_bytes += len(data)
+        super().save(chat_id, config)
+
+    def write_snapshot(self, seq, chats):
+        data = json.dumps({"seq": seq, "chats": chats}).encode('utf-8')
+        tmp_file = f"{self.snapshot_path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_path)
+        fsync_dir(self.snapshot_path)
+        return len(data)
+
+    def write(self, dirty):
+        # save() runs on the event loop and takes self.lock, so only the
+        # bookkeeping happens under it; the fsync and the snapshot run outside.
+        with self.lock:
+            self.journal.flush()
+            fd = self.journal.fileno()
+            written, self.unsynced_bytes = self.unsynced_bytes, 0
+            compact = self.journal_bytes >= self.compact_bytes
+            if compact:
+                # Saves replace persisted[chat_id] rather than mutate it, so a shallow copy is a snapshot.
+                seq, chats, covered_bytes = self.seq, dict(self.persisted), self.journal_bytes
+        os.fsync(fd)
+        if not compact:
+            return written
+        snapshot_bytes = self.write_snapshot(seq, chats)
+        # The records appended since covered_bytes go into a new journal that
+        # replaces the old one in a single rename, so a crash leaves one of the
+        # two whole; replay skips records at or below the snapshot's seq, so
+        # either restores the same state. The bulk is copied and fsynced
+        # without the lock, then only the records saved meanwhile are added.
+        tmp_file = f"{self.journal_path}.tmp"
+        with self.lock:
+            self.journal.flush()
+            copied_bytes = self.journal_bytes
+        with open(self.journal_path, 'rb') as src, open(tmp_file, 'wb') as dst:
+            src.seek(covered_bytes)
+            dst.write(src.read(copied_bytes - covered_bytes))
+            dst.flush()
+            os.fsync(dst.fileno())
+        with self.lock:
+            self.journal.flush()
+            with open(self.journal_path, 'rb') as src, open(tmp_file, 'ab') as dst:
+                src.seek(copied_bytes)
+                dst.write(src.read())
+            os.replace(tmp_file, self.journal_path)
+            self.journal.close()
+            self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            self.journal_bytes = self.journal.tell()
+            self.stats["compactions"] += 1
+        fsync_dir(self.journal_path)
+        logger.info(f"Compacted chat journal into a {snapshot_bytes} byte snapshot.")
+        return written + snapshot_bytes
+
+    def close(self):
+        super().close()
+        with self.flush_lock, self.lock:
+            if self.journal and not self.journal.closed:
+                self.journal.close()
+
+CHAT_STORES = {
+    "json": JsonChatConfigStore,
+    "sqlite": SqliteChatConfigStore,
+    "journal": JournalChatConfigStore,
+}
+
+def open_chat_store(name):
+    if name not in CHAT_STORES:
+        logger.warning(f"Unknown chat store {name!r}, falling back to sqlite.")
+        name = "sqlite"
+    return CHAT_STORES[name]()
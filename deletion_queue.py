@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DELETIONS_FILE = 'pending_deletions.json'
+DELETE_RATE = float(os.environ.get("DELETE_RATE", 10))
+DELETE_BATCH_SIZE = int(os.environ.get("DELETE_BATCH_SIZE", 100))
+DELETE_RETRY_DELAY = float(os.environ.get("DELETE_RETRY_DELAY", 5))
+DELETE_MAX_ATTEMPTS = int(os.environ.get("DELETE_MAX_ATTEMPTS", 5))
+DELETE_FLUSH_INTERVAL = float(os.environ.get("DELETE_FLUSH_INTERVAL", 5))
+
+# ----------------------------- Deletion Queue ----------------------------- #
+# send_quiz only sends the new poll; the previous one is handed to this queue
+# as (chat_id, message_id). One task drains it, a chat at a time, with up to
+# DELETE_BATCH_SIZE of that chat's messages per delete() call, and paces the
+# calls with a DELETE_RATE token bucket so deletions never crowd out sends.
+# delete() raises to ask for another try: those messages wait out an
+# exponential backoff and are dropped after DELETE_MAX_ATTEMPTS. Everything
+# still pending is written to DELETIONS_FILE at most every
+# DELETE_FLUSH_INTERVAL seconds and on stop, and reloaded on start.
+
+class DeletionQueue:
+    def __init__(self, delete, path=DELETIONS_FILE, rate=DELETE_RATE, batch_size=DELETE_BATCH_SIZE,
+                 retry_delay=DELETE_RETRY_DELAY, max_attempts=DELETE_MAX_ATTEMPTS, flush_interval=DELETE_FLUSH_INTERVAL):
+        self.delete = delete
+        self.path = path
+        self.bucket = TokenBucket(rate, 1)
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.flush_interval = flush_interval
+        self.ready = OrderedDict()
+        self.retrying = []
+        self.attempts = {}
+        self.counter = itertools.count()
+        self.dirty = False
+        self.next_flush = 0.0
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.stats = {
+            "queued": 0,
+            "deleted": 0,
+            "calls": 0,
+            "retries": 0,
+            "dropped": 0,
+            "flushes": 0,
+        }
+
+    def add(self, chat_id: int, message_id: int) -> None:
+        self.ready.setdefault(chat_id, []).append(message_id)
+        self.stats["queued"] += 1
+        self.dirty = True
+        self.wakeup.set()
+
+    def __len__(self):
+        return sum(len(message_ids) for message_ids in self.ready.values()) + \
+            sum(len(entry[3]) for entry in self.retrying)
+
+    def pending(self):
+        pending = [[chat_id, message_id] for chat_id, message_ids in self.ready.items() for message_id in message_ids]
+        pending.extend([chat_id, message_id] for _, _, chat_id, message_ids in self.retrying for message_id in message_ids)
+        return pending
+
+    # ----------------------------- Persistence ----------------------------- #
+
+    def load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                pending = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load pending deletions: {e}")
+            return 0
+        for chat_id, message_id in pending:
+            self.ready.setdefault(chat_id, []).append(message_id)
+        logger.info(f"Restored {len(pending)} pending quiz deletions.")
+        return len(pending)
+
+    def write(self, data: bytes) -> None:
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+
+    async def flush(self) -> None:
+        self.dirty = False
+        self.next_flush = time.monotonic() + self.flush_interval
+        data = json.dumps(self.pending()).encode('utf-8')
+        try:
+            await asyncio.to_thread(self.write, data)
+            self.stats["flushes"] += 1
+        except Exception as e:
+            logger.error(f"Failed to save pending deletions: {e}")
+            self.dirty = True
+
+    # ----------------------------- Draining ----------------------------- #
+
+    def promote_due(self, now) -> None:
+        while self.retrying and self.retrying[0][0] <= now:
+            _, _, chat_id, message_ids = heapq.heappop(self.retrying)
+            self.ready.setdefault(chat_id, []).extend(message_ids)
+
+    def take_batch(self):
+        chat_id, message_ids = self.ready.popitem(last=False)
+        batch, rest = message_ids[:self.batch_size], message_ids[self.batch_size:]
+        if rest:
+            # Back of the line, so one chat's backlog cannot starve the others.
+            self.ready[chat_id] = rest
+        return chat_id, batch
+
+    async def delete_batch(self, chat_id: int, message_ids) -> None:
+        self.stats["calls"] += 1
+        try:
+            await self.delete(chat_id, message_ids)
+        except asyncio.CancelledError:
+            # Stopped mid-call: put the batch back so it is saved and retried.
+            self.ready.setdefault(chat_id, [])[:0] = message_ids
+            raise
+        except Exception as e:
+            self.retry(chat_id, message_ids, e)
+            return
+        self.stats["deleted"] += len(message_ids)
+        for message_id in message_ids:
+            self.attempts.pop((chat_id, message_id), None)
+        self.dirty = True
+
+    def retry(self, chat_id: int, message_ids, error) -> None:
+        retry_ids = []
+        attempts = 0
+        for message_id in message_ids:
+            key = (chat_id, message_id)
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            if self.attempts[key] > self.max_attempts:
+                del self.attempts[key]
+                self.stats["dropped"] += 1
+                logger.warning(f"Gave up deleting quiz {message_id} in chat {chat_id}: {error}")
+                continue
+            retry_ids.append(message_id)
+            attempts = max(attempts, self.attempts[key])
+        if not retry_ids:
+            self.dirty = True
+            return
+        self.stats["retries"] += 1
+        due = time.monotonic() + self.retry_delay * 2 ** (attempts - 1)
+        heapq.heappush(self.retrying, (due, next(self.counter), chat_id, retry_ids))
+        logger.warning(f"Failed to delete {len(retry_ids)} quizzes in chat {chat_id}, retrying: {error}")
+
+    async def wait(self, timeout=None) -> None:
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.promote_due(now)
+            if self.dirty and now >= self.next_flush:
+                await self.flush()
+            if not self.ready:
+                deadlines = [entry[0] for entry in self.retrying[:1]]
+                if self.dirty:
+                    deadlines.append(self.next_flush)
+                await self.wait(max(0.0, min(deadlines) - now) if deadlines else None)
+                continue
+            delay = self.bucket.reserve(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            chat_id, message_ids = self.take_batch()
+            await self.delete_batch(chat_id, message_ids)
+
+    def start(self) -> None:
+        self.load()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
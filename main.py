@@ -1,23 +1,47 @@
+import asyncio
+import hmac
 import logging
 import random
-import json
 import os
+import secrets
+import signal
+import time
 from telegram import (
+    Bot,
     Update,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
-    ParseMode,
 )
+from telegram.constants import ParseMode
 from telegram.ext import (
-    Updater,
+    Application,
+    BaseRateLimiter,
     CommandHandler,
     CallbackQueryHandler,
+    ChatMemberHandler,
     MessageHandler,
-    Filters,
-    CallbackContext,
+    filters,
+    ContextTypes,
 )
-from flask import Flask
-from threading import Thread
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from cache import TTLCache
+from chat_store import default_chat_config, open_chat_store
+from deletion_queue import DeletionQueue
+from metrics import REGISTRY, Gauge
+from question_bank import (
+    QUESTIONS,
+    QuestionBankWatcher,
+    close_question_bank,
+    load_question_bank,
+    next_question_id,
+    pick_question_id,
+    set_topic_gauges,
+)
+from question_topics import TOPIC_LABELS, TOPICS
+from rate_limiter import PRIORITY_SCHEDULED, RateLimiter, current_priority, priority_lane
+from scheduler import QuizDispatcher
+from web_server import WebServer, json_response, text_response
 
 # ----------------------------- Logging Setup ----------------------------- #
 logging.basicConfig(
@@ -26,105 +50,196 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ----------------------------- Load Questions from JSON ----------------------------- #
-def load_questions():
-    try:
-        with open('questions.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        valid_questions = []
-        for q in data:
-            if isinstance(q, dict) and "question" in q and "options" in q and isinstance(q["options"], list):
-                valid_questions.append(q)
-            else:
-                logger.warning(f"Invalid question format skipped: {q}")
-        logger.info(f"Loaded {len(valid_questions)} valid questions from JSON file.")
-        return valid_questions
-    except Exception as e:
-        logger.error(f"Failed to load questions from JSON: {e}")
-        return []
-
-questions = load_questions()
+# ----------------------------- Load Questions ----------------------------- #
+# questions.bin when it has been compiled from questions.json, else the JSON.
+# question_watcher swaps in a rebuilt index whenever either file changes. Every
+# reader looks a question up without awaiting in between, so the index it
+# replaces is no longer in use and its mapping can be closed right away.
+question_index = load_question_bank()
+QUESTIONS.set(len(question_index["questions"]))
+set_topic_gauges(question_index)
+question_watcher = None
+
+def set_question_index(index):
+    global question_index
+    previous, question_index = question_index, index
+    close_question_bank(previous)
 
 # ------------------------- Persistent Chat Configuration ------------------------- #
-CONFIG_FILE = 'chat_config.json'
+# chat_config caches the configs of chats seen since startup; chat_store persists
+# them. CHAT_STORE picks the backend: "sqlite" (default), "journal" or "json".
+CHAT_STORE = os.environ.get("CHAT_STORE", "sqlite")
+chat_store = None
 chat_config = {}
 
 def load_chat_config():
-    global chat_config
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                chat_config = json.load(f)
-            logger.info("Chat configuration loaded from file.")
-        except Exception as e:
-            logger.error(f"Failed to load chat config: {e}")
-            chat_config = {}
-    else:
-        chat_config = {}
+    global chat_store
+    chat_store = open_chat_store(CHAT_STORE)
+    chat_config.clear()
+    chat_config.update(chat_store.load())
+    chat_store.start()
+
+CONFIG_SAVE_SECONDS = REGISTRY.histogram(
+    "quizbot_chat_config_save_seconds", "Time spent in save_chat_config on the calling task.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
 
-def save_chat_config():
-    try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(chat_config, f)
-    except Exception as e:
-        logger.error(f"Failed to save chat config: {e}")
+def save_chat_config(chat_id):
+    start = time.perf_counter()
+    chat_store.save(str(chat_id), chat_config[str(chat_id)])
+    CONFIG_SAVE_SECONDS.observe(time.perf_counter() - start)
 
 def ensure_chat_config(chat_id: int):
-    if str(chat_id) not in chat_config:
-        chat_config[str(chat_id)] = {
-            "language": "English",
-            "auto_delete": True,
-            "auto_pin": False,
-            "last_quiz_id": None,
-            "active": True
-        }
-        save_chat_config()
-    return chat_config[str(chat_id)]
+    key = str(chat_id)
+    config = chat_config.get(key)
+    if config is None:
+        config = chat_store.get(key)
+        if config is None:
+            config = default_chat_config()
+            chat_config[key] = config
+            save_chat_config(chat_id)
+        else:
+            chat_config[key] = config
+    return config
+
+# ----------------------------- Outbound Rate Limiting ----------------------------- #
+# Every Bot API call goes through PriorityRateLimiter: a global bucket keeps us
+# under Telegram's ~30 msgs/s, per-chat buckets under ~20 msgs/min per group,
+# and RetryAfter answers pause the offending chat before the call is retried.
+# send_quiz runs in the scheduled lane so settings taps are never stuck behind it.
+GLOBAL_RATE_LIMIT = float(os.environ.get("GLOBAL_RATE_LIMIT", 30))
+CHAT_RATE_LIMIT = float(os.environ.get("CHAT_RATE_LIMIT", 20))
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", 3))
+UNLIMITED_ENDPOINTS = {"getUpdates", "getMe", "setWebhook", "deleteWebhook", "getWebhookInfo"}
+CHAT_LIMITED_ENDPOINTS = {"sendMessage", "sendPoll", "editMessageText", "editMessageReplyMarkup"}
+
+API_SECONDS = REGISTRY.histogram("quizbot_bot_api_request_seconds", "Bot API call latency, excluding rate limiting.", ["method"])
+API_ERRORS = REGISTRY.counter("quizbot_bot_api_errors_total", "Bot API calls that raised, by error.", ["method", "error"])
+
+rate_limiter = RateLimiter(
+    global_rate=GLOBAL_RATE_LIMIT,
+    global_burst=GLOBAL_RATE_LIMIT,
+    chat_rate=CHAT_RATE_LIMIT / 60,
+    chat_burst=CHAT_RATE_LIMIT,
+)
+
+class PriorityRateLimiter(BaseRateLimiter):
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in UNLIMITED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+        chat_id = data.get("chat_id")
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            await rate_limiter.acquire(chat_id, current_priority.get(), endpoint in CHAT_LIMITED_ENDPOINTS)
+            start = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                API_ERRORS.labels(endpoint, "RetryAfter").inc()
+                if attempt == RATE_LIMIT_MAX_RETRIES:
+                    raise
+                logger.warning(f"Flood limit on {endpoint} in chat {chat_id}, retrying in {e.retry_after}s.")
+                rate_limiter.pause(e.retry_after, chat_id)
+            except Exception as e:
+                API_ERRORS.labels(endpoint, type(e).__name__).inc()
+                raise
+            finally:
+                API_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
 
 # ----------------------------- Utility Functions ----------------------------- #
+ADMIN_STATUSES = ["administrator", "creator"]
+ADMIN_CACHE_TTL = float(os.environ.get("ADMIN_CACHE_TTL", 300))
+ADMIN_CACHE_SIZE = int(os.environ.get("ADMIN_CACHE_SIZE", 10000))
+
+# (chat_id, user_id) -> is admin. Repeated taps on the settings menu answer
+# from here instead of paying a get_chat_member round-trip each time.
+admin_cache = TTLCache(ADMIN_CACHE_TTL, ADMIN_CACHE_SIZE)
+
+# chat_id -> the bot's own capabilities ({"can_pin", "can_delete", "can_send_polls"}),
+# kept fresh by my_chat_member updates so send_quiz can skip calls that would fail.
+BOT_RIGHTS_CACHE_TTL = float(os.environ.get("BOT_RIGHTS_CACHE_TTL", 3600))
+bot_rights_cache = TTLCache(BOT_RIGHTS_CACHE_TTL, int(os.environ.get("BOT_RIGHTS_CACHE_SIZE", 100000)))
 
 def get_random_question():
-    if not questions:
+    if not question_index["questions"]:
         return None
-    return random.choice(questions)
+    return random.choice(question_index["questions"])
 
-def get_valid_random_question():
-    if not questions:
-        return None
-    valid_questions = [q for q in questions if len(q["question"].split()) <= 100]
-    if valid_questions:
-        return random.choice(valid_questions)
+QUESTION_PICK_SECONDS = REGISTRY.histogram(
+    "quizbot_question_pick_seconds", "Time to pick the next question for a chat.",
+    buckets=(0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005),
+)
+
+def get_valid_random_question(config=None, index=None):
+    if index is None:
+        index = question_index
+    start = time.perf_counter()
+    if config is None:
+        question_id = pick_question_id(index)
     else:
+        question_id = next_question_id(index, config)
+    QUESTION_PICK_SECONDS.observe(time.perf_counter() - start)
+    if question_id is None:
         logger.warning("No valid questions with 100 words or less available.")
-        return None
+    return question_id
 
-def is_user_admin(update: Update, context: CallbackContext) -> bool:
+async def is_user_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
+    cached = admin_cache.get((chat_id, user_id))
+    if cached is not None:
+        return cached
     try:
-        member = context.bot.get_chat_member(chat_id, user_id)
-        if member.status in ["administrator", "creator"]:
-            return True
+        member = await context.bot.get_chat_member(chat_id, user_id)
+        is_admin = member.status in ADMIN_STATUSES
+        admin_cache.set((chat_id, user_id), is_admin)
+        return is_admin
     except Exception as e:
         logger.warning(f"Admin check failed: {e}")
     return False
 
-def has_pin_permission(chat_id: int, context: CallbackContext) -> bool:
+def rights_from_member(member) -> dict:
+    # The bot can always delete its own recent quizzes while it is in the chat;
+    # pinning needs the admin right, sending polls can be restricted.
+    status = member.status
+    if status == "creator":
+        return {"can_pin": True, "can_delete": True, "can_send_polls": True}
+    if status in ["left", "kicked"]:
+        return {"can_pin": False, "can_delete": False, "can_send_polls": False}
+    return {
+        "can_pin": bool(getattr(member, "can_pin_messages", False)),
+        "can_delete": True,
+        "can_send_polls": status != "restricted" or bool(getattr(member, "can_send_polls", False)),
+    }
+
+async def get_bot_rights(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
+    rights = bot_rights_cache.get(chat_id)
+    if rights is not None:
+        return rights
     try:
-        bot_member = context.bot.get_chat_member(chat_id, context.bot.id)
-        if hasattr(bot_member, "can_pin_messages") and bot_member.can_pin_messages:
-            return True
+        rights = rights_from_member(await context.bot.get_chat_member(chat_id, context.bot.id))
     except Exception as e:
-        logger.warning(f"Failed to check pin permission in chat {chat_id}: {e}")
-    return False
+        logger.warning(f"Failed to check bot permissions in chat {chat_id}: {e}")
+        return None
+    bot_rights_cache.set(chat_id, rights)
+    return rights
+
+async def has_pin_permission(chat_id: int, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    rights = await get_bot_rights(chat_id, context)
+    return bool(rights and rights["can_pin"])
 
-def send_nonadmin_error(query, context: CallbackContext):
+async def send_nonadmin_error(query, context: ContextTypes.DEFAULT_TYPE):
     keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Close", callback_data="close")]])
-    query.edit_message_text(text="You don't have admin right to perform this action.", reply_markup=keyboard)
+    await query.edit_message_text(text="You don't have admin right to perform this action.", reply_markup=keyboard)
 
 # ----------------------------- Command Handlers ----------------------------- #
 
-def start(update: Update, context: CallbackContext) -> None:
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
     user_first = update.effective_user.first_name
 
@@ -136,11 +251,11 @@ def start(update: Update, context: CallbackContext) -> None:
             [InlineKeyboardButton("Start Me", url="https://t.me/ThinkChessyBot")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
         config = ensure_chat_config(chat_id)
         config["active"] = True
-        save_chat_config()
-        schedule_quiz(context.job_queue, chat_id)
+        save_chat_config(chat_id)
+        schedule_quiz(chat_id, send_now=True)
     else:
         welcome_text = (
             "♟️ Welcome to ThinkChessy Bot! 🧠\n"
@@ -157,11 +272,11 @@ def start(update: Update, context: CallbackContext) -> None:
             [InlineKeyboardButton("📝 About", callback_data="about")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        update.message.reply_text(welcome_text, reply_markup=reply_markup)
+        await update.message.reply_text(welcome_text, reply_markup=reply_markup)
 
-def settings(update: Update, context: CallbackContext) -> None:
+async def settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.effective_chat.type not in ["group", "supergroup"]:
-        update.message.reply_text("⚠️ Oops! This command is only for groups.")
+        await update.message.reply_text("⚠️ Oops! This command is only for groups.")
         return
 
     chat_id = update.effective_chat.id
@@ -170,20 +285,22 @@ def settings(update: Update, context: CallbackContext) -> None:
         "🔩 Setup Zone\n\n"
         f"🌐 Language : {config.get('language', 'English')}\n"
         f"🗑️ Auto-Delete : {'ON' if config.get('auto_delete', True) else 'OFF'}\n"
-        f"📌 Auto-Pin : {'ON' if config.get('auto_pin', False) else 'OFF'}\n\n"
+        f"📌 Auto-Pin : {'ON' if config.get('auto_pin', False) else 'OFF'}\n"
+        f"🎯 Topics : {'Custom' if config.get('topic_weights') else 'All'}\n\n"
         "Select an option:"
     )
     keyboard = [
         [InlineKeyboardButton("🌐 Language", callback_data="change_language")],
         [InlineKeyboardButton("🗑️ Auto-Delete", callback_data="toggle_autodelete")],
-        [InlineKeyboardButton("📌 Auto-Pin", callback_data="toggle_autopin")]
+        [InlineKeyboardButton("📌 Auto-Pin", callback_data="toggle_autopin")],
+        [InlineKeyboardButton("🎯 Topics", callback_data="change_topics")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    update.message.reply_text(settings_text, reply_markup=reply_markup)
+    await update.message.reply_text(settings_text, reply_markup=reply_markup)
 
-def about(update: Update, context: CallbackContext) -> None:
+async def about(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    query.answer()
+    await query.answer()
     about_text = (
         "🧠 About ThinkChessy Bot (@ThinkChessyBot)\n\n"
         "Welcome to ThinkChessy, your ultimate chess quiz companion ♟️\n"
@@ -199,11 +316,11 @@ def about(update: Update, context: CallbackContext) -> None:
         [InlineKeyboardButton("↩️ Back", callback_data="back_from_about")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=about_text, reply_markup=reply_markup)
+    await query.edit_message_text(text=about_text, reply_markup=reply_markup)
 
-def back_from_about(update: Update, context: CallbackContext) -> None:
+async def back_from_about(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    query.answer()
+    await query.answer()
     chat_type = update.effective_chat.type
     welcome_text = (
         "♟️ Welcome to ThinkChessy Bot! 🧠\n"
@@ -226,16 +343,16 @@ def back_from_about(update: Update, context: CallbackContext) -> None:
             [InlineKeyboardButton("📝 About", callback_data="about")]
         ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=welcome_text, reply_markup=reply_markup)
+    await query.edit_message_text(text=welcome_text, reply_markup=reply_markup)
 
 # ----------------------------- Settings Callback Handlers ----------------------------- #
 
-def change_language(update: Update, context: CallbackContext) -> None:
+async def change_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     current_language = config.get("language", "English")
@@ -246,14 +363,14 @@ def change_language(update: Update, context: CallbackContext) -> None:
         [InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=text, reply_markup=reply_markup)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
 
-def toggle_autodelete(update: Update, context: CallbackContext) -> None:
+async def toggle_autodelete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     current_status = config.get("auto_delete", True)
@@ -270,14 +387,14 @@ def toggle_autodelete(update: Update, context: CallbackContext) -> None:
         [InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=text, reply_markup=reply_markup)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
 
-def toggle_autopin(update: Update, context: CallbackContext) -> None:
+async def toggle_autopin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     current_status = config.get("auto_pin", False)
@@ -294,14 +411,14 @@ def toggle_autopin(update: Update, context: CallbackContext) -> None:
         [InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=text, reply_markup=reply_markup)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
 
-def autopin_selection(update: Update, context: CallbackContext) -> None:
+async def autopin_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     data_parts = query.data.split("_")
     if len(data_parts) < 2:
         logger.error("Invalid callback data format for auto-pin selection.")
@@ -310,9 +427,9 @@ def autopin_selection(update: Update, context: CallbackContext) -> None:
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     if selection == "ON":
-        if not has_pin_permission(chat_id, context):
+        if not await has_pin_permission(chat_id, context):
             keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Close", callback_data="close")]])
-            query.edit_message_text(
+            await query.edit_message_text(
                 text="To perform this action, please make me admin with pin messages permission.",
                 reply_markup=keyboard
             )
@@ -321,18 +438,18 @@ def autopin_selection(update: Update, context: CallbackContext) -> None:
     else:
         new_status = False
     config["auto_pin"] = new_status
-    save_chat_config()
-    query.edit_message_text(
+    save_chat_config(chat_id)
+    await query.edit_message_text(
         text=f"Auto-Pin set to {'ON' if new_status else 'OFF'}.",
         reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]])
     )
 
-def language_selection(update: Update, context: CallbackContext) -> None:
+async def language_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     data_parts = query.data.split("_")
     if len(data_parts) < 2:
         logger.error("Invalid callback data format for language selection.")
@@ -341,18 +458,18 @@ def language_selection(update: Update, context: CallbackContext) -> None:
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     config["language"] = lang
-    save_chat_config()
-    query.edit_message_text(
+    save_chat_config(chat_id)
+    await query.edit_message_text(
         text=f"Language set to {lang}.",
         reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]])
     )
 
-def autodelete_selection(update: Update, context: CallbackContext) -> None:
+async def autodelete_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    if not is_user_admin(update, context):
-        send_nonadmin_error(query, context)
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
         return
-    query.answer()
+    await query.answer()
     data_parts = query.data.split("_")
     if len(data_parts) < 2:
         logger.error("Invalid callback data format for auto-delete selection.")
@@ -362,123 +479,469 @@ def autodelete_selection(update: Update, context: CallbackContext) -> None:
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     config["auto_delete"] = new_status
-    save_chat_config()
-    query.edit_message_text(
+    save_chat_config(chat_id)
+    await query.edit_message_text(
         text=f"Auto-Delete set to {'ON' if new_status else 'OFF'}.",
         reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")]])
     )
 
-def back_to_settings(update: Update, context: CallbackContext) -> None:
+# Each tap on a topic steps its weight through TOPIC_WEIGHT_LEVELS. A weight of 2
+# makes the topic twice as likely as by default, 0 switches it off (see
+# question_bank's topic weights); no weights at all means the whole bank.
+TOPIC_WEIGHT_LEVELS = [1, 2, 3, 0]
+TOPIC_WEIGHT_NAMES = {0: "Off", 1: "Normal", 2: "More", 3: "Most"}
+
+def topics_menu(config):
+    weights = config.get("topic_weights") or {}
+    text = (
+        "🎯 Quiz Topics\n\n"
+        "Tap a topic to change how often it comes up:\n"
+        "Normal → More → Most → Off\n\n"
+        + "\n".join(f"{TOPIC_LABELS[name]} : {TOPIC_WEIGHT_NAMES.get(weights.get(name, 1), 'Custom')}" for name in TOPICS)
+    )
+    keyboard = [
+        [InlineKeyboardButton(TOPIC_LABELS[name], callback_data=f"topic_{name}")] for name in TOPICS
+    ]
+    keyboard.append([InlineKeyboardButton("♻️ Reset", callback_data="topic_reset")])
+    keyboard.append([InlineKeyboardButton("↩️ Back", callback_data="back_to_settings")])
+    return text, InlineKeyboardMarkup(keyboard)
+
+async def change_topics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
+        return
+    await query.answer()
+    config = ensure_chat_config(update.effective_chat.id)
+    text, reply_markup = topics_menu(config)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
+
+async def topic_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    if not await is_user_admin(update, context):
+        await send_nonadmin_error(query, context)
+        return
+    topic = query.data.split("_", 1)[1]
+    chat_id = update.effective_chat.id
+    config = ensure_chat_config(chat_id)
+    if topic == "reset":
+        config["topic_weights"] = None
+    elif topic in TOPICS:
+        weights = dict(config.get("topic_weights") or {})
+        current = weights.get(topic, 1)
+        level = TOPIC_WEIGHT_LEVELS.index(current) if current in TOPIC_WEIGHT_LEVELS else 0
+        weights[topic] = TOPIC_WEIGHT_LEVELS[(level + 1) % len(TOPIC_WEIGHT_LEVELS)]
+        # With every topic Off the sampler has nothing to draw from and the chat
+        # would quietly fall back to the whole bank, so keep one on.
+        if all(weights.get(name, 1) == 0 for name in TOPICS):
+            await query.answer("At least one topic has to stay on.", show_alert=True)
+            return
+        # All Normal is the same as no weights; store nothing then.
+        config["topic_weights"] = weights if any(weight != 1 for weight in weights.values()) else None
+    else:
+        await query.answer()
+        logger.error("Invalid callback data format for topic selection.")
+        return
+    await query.answer()
+    save_chat_config(chat_id)
+    text, reply_markup = topics_menu(config)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
+
+async def back_to_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    query.answer()
+    await query.answer()
     chat_id = update.effective_chat.id
     config = ensure_chat_config(chat_id)
     settings_text = (
         "🔩 Setup Zone\n\n"
         f"🌐 Language : {config.get('language', 'English')}\n"
         f"🗑️ Auto-Delete : {'ON' if config.get('auto_delete', True) else 'OFF'}\n"
-        f"📌 Auto-Pin : {'ON' if config.get('auto_pin', False) else 'OFF'}\n\n"
+        f"📌 Auto-Pin : {'ON' if config.get('auto_pin', False) else 'OFF'}\n"
+        f"🎯 Topics : {'Custom' if config.get('topic_weights') else 'All'}\n\n"
         "Select an option:"
     )
     keyboard = [
         [InlineKeyboardButton("🌐 Language", callback_data="change_language")],
         [InlineKeyboardButton("🗑️ Auto-Delete", callback_data="toggle_autodelete")],
-        [InlineKeyboardButton("📌 Auto-Pin", callback_data="toggle_autopin")]
+        [InlineKeyboardButton("📌 Auto-Pin", callback_data="toggle_autopin")],
+        [InlineKeyboardButton("🎯 Topics", callback_data="change_topics")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    query.edit_message_text(text=settings_text, reply_markup=reply_markup)
+    await query.edit_message_text(text=settings_text, reply_markup=reply_markup)
 
-def close_message(update: Update, context: CallbackContext) -> None:
+async def close_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
-    query.answer()
+    await query.answer()
     try:
-        query.message.delete()
+        await query.message.delete()
     except Exception as e:
         logger.warning(f"Failed to delete message on close: {e}")
 
 # ----------------------------- Quiz Scheduling and Sending ----------------------------- #
 
-def send_quiz(context: CallbackContext) -> None:
-    job = context.job
-    chat_id = job.context
+quiz_dispatcher = None
+deletion_queue = None
+
+# Reasons follow the warnings logged in send_scheduled_quiz.
+QUIZZES_SENT = REGISTRY.counter("quizbot_quizzes_sent_total", "Quizzes sent.")
+QUIZZES_SKIPPED = REGISTRY.counter("quizbot_quizzes_skipped_total", "Quizzes not sent, by reason.", ["reason"])
+QUIZZES_FAILED = REGISTRY.counter("quizbot_quizzes_failed_total", "Quiz sends and pins that failed, by reason.", ["reason"])
+
+async def send_quiz(bot: Bot, chat_id: int) -> None:
+    with priority_lane(PRIORITY_SCHEDULED):
+        await send_scheduled_quiz(bot, chat_id)
+
+async def send_scheduled_quiz(bot: Bot, chat_id: int) -> None:
     config = ensure_chat_config(chat_id)
 
-    question_data = get_valid_random_question()
-    if question_data is None:
+    # Pick and read from the same index even if a reload swaps it meanwhile.
+    index = question_index
+    question_id = get_valid_random_question(config, index)
+    if question_id is None:
         logger.error(f"No valid questions to send in chat {chat_id}.")
+        QUIZZES_SKIPPED.labels("no_question").inc()
         return
 
-    question_text = question_data["question"]
-    options = question_data["options"]
-    safe_options = [opt if len(opt) <= 100 else opt[:100] for opt in options]
-    answer_letter = question_data.get("answer", "A").upper()
-    mapping = {"A": 0, "B": 1, "C": 2, "D": 3}
-    correct_option_id = mapping.get(answer_letter, 0)
+    question = index["questions"][question_id]
 
-    if config.get("auto_delete", True) and config.get("last_quiz_id"):
-        try:
-            context.bot.delete_message(chat_id=chat_id, message_id=config["last_quiz_id"])
-        except Exception as e:
-            logger.warning(f"Failed to delete previous quiz in chat {chat_id}: {e}")
+    rights = bot_rights_cache.get(chat_id)
+    if rights is not None and not rights["can_send_polls"]:
+        logger.warning(f"Skipping quiz in chat {chat_id}: no permission to send polls.")
+        QUIZZES_SKIPPED.labels("no_poll_permission").inc()
+        return
 
+    previous_quiz_id = config.get("last_quiz_id")
     try:
-        poll = context.bot.send_poll(
+        poll = await bot.send_poll(
             chat_id=chat_id,
-            question=question_text,
-            options=safe_options,
+            question=question.question,
+            options=list(question.options),
             type="quiz",
-            correct_option_id=correct_option_id,
+            correct_option_id=question.correct_option_id,
             is_anonymous=False
         )
-        config["last_quiz_id"] = poll.message_id
-        config["active"] = True
-        save_chat_config()
+    except RetryAfter as e:
+        # Still flood-limited after retrying; the chat is fine, try next tick.
+        logger.warning(f"Skipped quiz in chat {chat_id}: {e}")
+        QUIZZES_SKIPPED.labels("flood_limited").inc()
+        return
+    except Exception as e:
+        if not is_chat_gone(e):
+            # Network errors, timeouts and the like: the chat stays scheduled.
+            logger.warning(f"Failed to send quiz in chat {chat_id}: {e}")
+            QUIZZES_FAILED.labels("send_error").inc()
+            return
+        # Only a chat the bot can no longer post to is switched off; it is
+        # scheduled again when the bot is re-added or /start is used.
+        logger.warning(f"Stopping quizzes in chat {chat_id}: {e}")
+        QUIZZES_FAILED.labels("chat_gone").inc()
+        config["active"] = False
+        save_chat_config(chat_id)
+        unschedule_quiz(chat_id)
+        return
 
-        if config.get("auto_pin", False):
+    config["last_quiz_id"] = poll.message_id
+    config["active"] = True
+    save_chat_config(chat_id)
+    QUIZZES_SENT.inc()
+
+    # The previous quiz is deleted later by deletion_queue, off the send path.
+    if config.get("auto_delete", True) and previous_quiz_id and (rights is None or rights["can_delete"]):
+        deletion_queue.add(chat_id, previous_quiz_id)
+
+    if config.get("auto_pin", False):
+        if rights is not None and not rights["can_pin"]:
+            QUIZZES_FAILED.labels("pin_no_rights").inc()
+            await disable_auto_pin(chat_id, config, bot)
+        else:
             try:
-                context.bot.pin_chat_message(chat_id=chat_id, message_id=poll.message_id, disable_notification=True)
+                await bot.pin_chat_message(chat_id=chat_id, message_id=poll.message_id, disable_notification=True)
             except Exception as e:
                 error_message = str(e)
                 logger.warning(f"Failed to pin message in chat {chat_id}: {error_message}")
+                QUIZZES_FAILED.labels("pin_error").inc()
                 if "Not enough rights" in error_message or "not enough rights" in error_message:
-                    config["auto_pin"] = False
-                    save_chat_config()
-                    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("↩️ Back", callback_data="close")]])
-                    context.bot.send_message(
-                        chat_id=chat_id,
-                        text="Auto-Pin feature has been turned off because I do not have the required permission to pin messages.",
-                        reply_markup=keyboard
-                    )
+                    await disable_auto_pin(chat_id, config, bot)
+
+def is_chat_gone(error) -> bool:
+    # The bot was removed or blocked, or the chat no longer exists.
+    return isinstance(error, Forbidden) or (isinstance(error, BadRequest) and "chat not found" in str(error).lower())
+
+async def delete_quizzes(bot: Bot, chat_id: int, message_ids) -> None:
+    # Raising hands the messages back to deletion_queue for a retry. Retrying
+    # won't help after a BadRequest (already gone or too old) or Forbidden (the
+    # bot was removed or lost its rights), so those drop the messages.
+    with priority_lane(PRIORITY_SCHEDULED):
+        if len(message_ids) > 1 and hasattr(bot, "delete_messages"):
+            try:
+                await bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+            except (BadRequest, Forbidden) as e:
+                logger.warning(f"Failed to delete previous quizzes in chat {chat_id}: {e}")
+            return
+        for message_id in message_ids:
+            try:
+                await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            except Forbidden as e:
+                logger.warning(f"Dropping {len(message_ids)} quiz deletions in chat {chat_id}: {e}")
+                return
+            except BadRequest as e:
+                logger.warning(f"Failed to delete previous quiz in chat {chat_id}: {e}")
+
+async def disable_auto_pin(chat_id: int, config, bot: Bot) -> None:
+    config["auto_pin"] = False
+    save_chat_config(chat_id)
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("↩️ Back", callback_data="close")]])
+    try:
+        await bot.send_message(
+            chat_id=chat_id,
+            text="Auto-Pin feature has been turned off because I do not have the required permission to pin messages.",
+            reply_markup=keyboard
+        )
     except Exception as e:
-        logger.warning(f"Failed to send quiz in chat {chat_id}: {e}")
-        config["active"] = False
-        save_chat_config()
-        return
-
-def schedule_quiz(job_queue, chat_id: int) -> None:
-    current_jobs = job_queue.get_jobs_by_name(str(chat_id))
-    for job in current_jobs:
-        job.schedule_removal()
-    job_queue.run_repeating(send_quiz, interval=1800, first=0, context=chat_id, name=str(chat_id))
+        logger.warning(f"Failed to send the Auto-Pin notice in chat {chat_id}: {e}")
+
+def schedule_quiz(chat_id: int, send_now: bool = False) -> None:
+    # The chat repeats on its own phase of the interval; a chat that just
+    # started the bot also gets one quiz right away and skips its next phase
+    # if that comes within half an interval.
+    quiz_dispatcher.add(chat_id)
+    if send_now:
+        quiz_dispatcher.send_now(chat_id)
     logger.info(f"Scheduled quiz for chat {chat_id}.")
 
-def new_chat_member(update: Update, context: CallbackContext) -> None:
+def unschedule_quiz(chat_id: int) -> None:
+    quiz_dispatcher.remove(chat_id)
+
+async def new_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     for member in update.message.new_chat_members:
         if member.username == "ThinkChessyBot":
             chat_id = update.effective_chat.id
             ensure_chat_config(chat_id)
-            update.message.reply_text(
+            await update.message.reply_text(
                 "Hi everyone! I'm ThinkChessyBot. I will now start sending chess quizzes every 30 minutes.\n"
                 "Use /settings to customize the settings."
             )
-            schedule_quiz(context.job_queue, chat_id)
+            schedule_quiz(chat_id, send_now=True)
+
+async def chat_member_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    member_update = update.chat_member
+    if member_update.old_chat_member.status != member_update.new_chat_member.status:
+        admin_cache.invalidate((member_update.chat.id, member_update.new_chat_member.user.id))
+
+async def my_chat_member_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    member_update = update.my_chat_member
+    chat_id = member_update.chat.id
+    bot_rights_cache.set(chat_id, rights_from_member(member_update.new_chat_member))
+    if member_update.new_chat_member.status in ["left", "kicked"]:
+        config = ensure_chat_config(chat_id)
+        config["active"] = False
+        save_chat_config(chat_id)
+        unschedule_quiz(chat_id)
+        logger.info(f"Removed from chat {chat_id}, quizzes stopped.")
 
 # ----------------------------- Error Handler ----------------------------- #
 
-def error_handler(update: object, context: CallbackContext) -> None:
+async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
 
 # ----------------------------- Bot Start ----------------------------- #
+# Updates are handled concurrently on one event loop, so a slow Bot API call in
+# one group never stalls the others; all calls share one HTTP connection pool.
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 256))
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# BOT_MODE=webhook receives updates on the web server's $PORT instead of long
+# polling. Telegram POSTs to WEBHOOK_URL + WEBHOOK_PATH with WEBHOOK_SECRET in
+# the X-Telegram-Bot-Api-Secret-Token header, and anything without it is refused.
+# Without a configured secret, each start generates one and hands it to set_webhook.
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+
+PORT = int(os.environ.get("PORT", 8080))
+
+bot_application = None
+webhook_ready = False
+
+def build_application(token: str) -> Application:
+    application = (
+        Application.builder()
+        .token(token)
+        .base_url(f"{TELEGRAM_API_URL}/bot")
+        .concurrent_updates(True)
+        .connection_pool_size(HTTP_POOL_SIZE)
+        .rate_limiter(PriorityRateLimiter())
+        .build()
+    )
+
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("settings", settings))
+    application.add_handler(CallbackQueryHandler(about, pattern="^about$"))
+    application.add_handler(CallbackQueryHandler(back_from_about, pattern="^back_from_about$"))
+    application.add_handler(CallbackQueryHandler(change_language, pattern="^change_language$"))
+    application.add_handler(CallbackQueryHandler(toggle_autodelete, pattern="^toggle_autodelete$"))
+    application.add_handler(CallbackQueryHandler(toggle_autopin, pattern="^toggle_autopin$"))
+    application.add_handler(CallbackQueryHandler(back_to_settings, pattern="^back_to_settings$"))
+    application.add_handler(CallbackQueryHandler(language_selection, pattern="^lang_"))
+    application.add_handler(CallbackQueryHandler(autodelete_selection, pattern="^autodelete_"))
+    application.add_handler(CallbackQueryHandler(autopin_selection, pattern="^autopin_"))
+    application.add_handler(CallbackQueryHandler(change_topics, pattern="^change_topics$"))
+    application.add_handler(CallbackQueryHandler(topic_selection, pattern="^topic_"))
+    application.add_handler(CallbackQueryHandler(close_message, pattern="^close$"))
+    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, new_chat_member))
+    application.add_handler(ChatMemberHandler(chat_member_update, ChatMemberHandler.CHAT_MEMBER))
+    application.add_handler(ChatMemberHandler(my_chat_member_update, ChatMemberHandler.MY_CHAT_MEMBER))
+
+    application.add_error_handler(error_handler)
+    return application
+
+async def run_bot(token: str) -> None:
+    global quiz_dispatcher, deletion_queue, question_watcher, bot_application, webhook_ready
+    application = build_application(token)
+    web_server = build_web_server()
+    await web_server.start()
+
+    quiz_dispatcher = QuizDispatcher(lambda chat_id: send_quiz(application.bot, chat_id))
+    deletion_queue = DeletionQueue(lambda chat_id, message_ids: delete_quizzes(application.bot, chat_id, message_ids))
+    question_watcher = QuestionBankWatcher(set_question_index)
+    for chat_id in chat_store.active_chat_ids():
+        quiz_dispatcher.add(int(chat_id))
+    logger.info(f"Scheduled quizzes for {quiz_dispatcher.stats['chats']} chats.")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    async with application:
+        await application.start()
+        bot_application = application
+        if BOT_MODE == "webhook":
+            await application.bot.set_webhook(
+                url=f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            webhook_ready = True
+            logger.info(f"Bot receiving updates by webhook at {WEBHOOK_URL}{WEBHOOK_PATH}.")
+        else:
+            await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+            logger.info("Bot started polling.")
+        quiz_dispatcher.start()
+        deletion_queue.start()
+        question_watcher.start()
+
+        await stop_event.wait()
+        logger.info("Stopping bot.")
+        bot_application = None
+        webhook_ready = False
+        await web_server.stop()
+        await quiz_dispatcher.stop()
+        await deletion_queue.stop()
+        await question_watcher.stop()
+        if application.updater.running:
+            await application.updater.stop()
+        await application.stop()
+
+# ----------------------------- Web Server ----------------------------- #
+# Served from the bot's own event loop on $PORT: /healthz answers as long as the
+# loop and the background tasks are alive, /readyz once updates are flowing and
+# the chat store and question bank are loaded, /metrics in Prometheus format.
+
+def background_tasks():
+    tasks = list(quiz_dispatcher.tasks) if quiz_dispatcher else []
+    for component in (deletion_queue, question_watcher):
+        if component and component.task:
+            tasks.append(component.task)
+    return tasks
+
+def readiness() -> dict:
+    application = bot_application
+    if BOT_MODE == "webhook":
+        receiving = webhook_ready
+    else:
+        receiving = application is not None and application.updater.running
+    return {
+        "updates": bool(receiving),
+        "chat_store": chat_store is not None,
+        "questions": bool(question_index["questions"]),
+    }
+
+def stats_gauges(prefix, stats):
+    gauges = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            gauges.extend(stats_gauges(name, value))
+            continue
+        gauge = Gauge(name, f"Internal stat {key} of {prefix}.")
+        gauge.set(value)
+        gauges.append(gauge)
+    return gauges
+
+def collect_state():
+    # Read at scrape time: chat counts and the components' own stats dicts.
+    gauges = []
+    if chat_store is not None:
+        chats = Gauge("quizbot_chats", "Known chats, by whether quizzes are active.", ["state"])
+        active, inactive = chat_store.chat_counts()
+        chats.labels("active").set(active)
+        chats.labels("inactive").set(inactive)
+        gauges.append(chats)
+        gauges.extend(stats_gauges("quizbot_chat_store", chat_store.stats))
+    if quiz_dispatcher is not None:
+        gauges.extend(stats_gauges("quizbot_dispatcher", quiz_dispatcher.stats))
+        gauges.extend(stats_gauges("quizbot_dispatcher", {"queue_depth": quiz_dispatcher.queue.qsize()}))
+    if deletion_queue is not None:
+        gauges.extend(stats_gauges("quizbot_deletion_queue", dict(deletion_queue.stats, pending=len(deletion_queue))))
+    gauges.extend(stats_gauges("quizbot_rate_limiter", rate_limiter.metrics()))
+    for name, cache in (("admin_cache", admin_cache), ("bot_rights_cache", bot_rights_cache)):
+        gauges.extend(stats_gauges(f"quizbot_{name}", {"size": len(cache), "hits": cache.hits, "misses": cache.misses}))
+    return gauges
+
+REGISTRY.add_collector(collect_state)
+
+async def home(request):
+    return text_response("Bot is running!")
+
+async def healthz(request):
+    if any(task.done() for task in background_tasks()):
+        return text_response("background task stopped", 503)
+    return text_response("ok")
+
+async def readyz(request):
+    checks = readiness()
+    return json_response(checks, 200 if all(checks.values()) else 503)
+
+async def metrics_endpoint(request):
+    return 200, "text/plain; version=0.0.4; charset=utf-8", REGISTRY.render()
+
+async def telegram_webhook(request):
+    token = request.headers.get("x-telegram-bot-api-secret-token", "")
+    if not hmac.compare_digest(token.encode('utf-8'), WEBHOOK_SECRET.encode('utf-8')):
+        return text_response("Forbidden", 403)
+    application = bot_application
+    if application is None:
+        return text_response("Bot is not ready", 503)
+    try:
+        update = Update.de_json(request.json(), application.bot)
+    except Exception as e:
+        logger.warning(f"Rejected malformed webhook update: {e}")
+        return text_response("Bad Request", 400)
+    # Acknowledge right away; the handlers pick the update up from the queue.
+    application.update_queue.put_nowait(update)
+    return text_response("")
+
+def build_web_server() -> WebServer:
+    web_server = WebServer(port=PORT)
+    web_server.route("/", home)
+    web_server.route("/healthz", healthz)
+    web_server.route("/readyz", readyz)
+    web_server.route("/metrics", metrics_endpoint)
+    if BOT_MODE == "webhook":
+        web_server.route(WEBHOOK_PATH, telegram_webhook, methods=("POST",))
+    return web_server
 
 def main() -> None:
     load_chat_config()
@@ -486,48 +949,10 @@ def main() -> None:
     if not TOKEN:
         logger.error("Bot token not found! Please set the TELEGRAM_BOT_TOKEN environment variable.")
         return
-
-    updater = Updater(TOKEN, use_context=True)
-    dispatcher = updater.dispatcher
-
-    dispatcher.add_handler(CommandHandler("start", start))
-    dispatcher.add_handler(CommandHandler("settings", settings))
-    dispatcher.add_handler(CallbackQueryHandler(about, pattern="^about$"))
-    dispatcher.add_handler(CallbackQueryHandler(back_from_about, pattern="^back_from_about$"))
-    dispatcher.add_handler(CallbackQueryHandler(change_language, pattern="^change_language$"))
-    dispatcher.add_handler(CallbackQueryHandler(toggle_autodelete, pattern="^toggle_autodelete$"))
-    dispatcher.add_handler(CallbackQueryHandler(toggle_autopin, pattern="^toggle_autopin$"))
-    dispatcher.add_handler(CallbackQueryHandler(back_to_settings, pattern="^back_to_settings$"))
-    dispatcher.add_handler(CallbackQueryHandler(language_selection, pattern="^lang_"))
-    dispatcher.add_handler(CallbackQueryHandler(autodelete_selection, pattern="^autodelete_"))
-    dispatcher.add_handler(CallbackQueryHandler(autopin_selection, pattern="^autopin_"))
-    dispatcher.add_handler(CallbackQueryHandler(close_message, pattern="^close$"))
-    dispatcher.add_handler(MessageHandler(Filters.status_update.new_chat_members, new_chat_member))
-
-    dispatcher.add_error_handler(error_handler)
-
-    updater.start_polling()
-    logger.info("Bot started polling.")
-
-    for chat_id in chat_config.keys():
-        try:
-            schedule_quiz(updater.job_queue, int(chat_id))
-        except Exception as e:
-            logger.warning(f"Failed to schedule quiz for chat {chat_id}: {e}")
-
-    updater.idle()
+    try:
+        asyncio.run(run_bot(TOKEN))
+    finally:
+        chat_store.close()
 
 if __name__ == '__main__':
-    # Start the Telegram bot in a separate thread
-    bot_thread = Thread(target=main)
-    bot_thread.start()
-
-    # ----------------------------- Flask Web Server to Keep the App Alive ----------------------------- #
-    app = Flask('')
-
-    @app.route('/')
-    def home():
-        return "Bot is running!"
-
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host='0.0.0.0', port=port)
+    main()
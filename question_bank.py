@@ -0,0 +1,623 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+from metrics import REGISTRY
+from question_topics import TOPICS, classify_question, record_topic
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_FILE = os.environ.get("QUESTIONS_FILE", 'questions.json')
+QUESTIONS_BANK_FILE = 'questions.bin'
+MAX_QUESTION_WORDS = 100
+# Telegram's quiz poll limits: the question, each option, and the option count.
+MAX_QUESTION_LENGTH = 300
+MAX_OPTION_LENGTH = 100
+MIN_OPTIONS = 2
+MAX_OPTIONS = 10
+ANSWER_MAPPING = {letter: option_id for option_id, letter in enumerate("ABCDEFGHIJ")}
+QUESTIONS_RELOAD_INTERVAL = float(os.environ.get("QUESTIONS_RELOAD_INTERVAL", 5))
+QUIZ_CLUSTER_WINDOW = int(os.environ.get("QUIZ_CLUSTER_WINDOW", 16))
+QUIZ_CLUSTER_SKIPS = 8
+
+RELOAD_SECONDS = REGISTRY.histogram("quizbot_question_bank_reload_seconds", "Time to rebuild the question bank on a reload.")
+RELOADS = REGISTRY.counter("quizbot_question_bank_reloads_total", "Question bank reloads, by result.", ["result"])
+REJECTED = REGISTRY.gauge("quizbot_question_bank_rejected_records", "Records rejected by the last question bank load.")
+QUESTIONS = REGISTRY.gauge("quizbot_question_bank_questions", "Questions in the current bank.")
+TOPIC_QUESTIONS = REGISTRY.gauge("quizbot_question_bank_topic_questions", "Eligible questions in the current bank, by topic.", ["topic"])
+
+# ----------------------------- Question Records ----------------------------- #
+# A loaded question keeps only what send_quiz needs, in a slotted record instead
+# of the parsed dict: options already cut to MAX_OPTION_LENGTH and interned (the
+# same answer texts recur across the bank), and the answer letter resolved to
+# its option index.
+
+class Question:
+    __slots__ = ("question", "options", "correct_option_id", "word_count")
+
+    def __init__(self, question, options, correct_option_id, word_count):
+        self.question = question
+        self.options = options
+        self.correct_option_id = correct_option_id
+        self.word_count = word_count
+
+    @classmethod
+    def from_dict(cls, q):
+        return cls(
+            q["question"],
+            tuple(sys.intern(opt[:MAX_OPTION_LENGTH]) for opt in q["options"]),
+            answer_option_id(q.get("answer", "A")),
+            len(q["question"].split()),
+        )
+
+def answer_option_id(answer):
+    # An answer is a letter ("B") or a 0-based option index (1); -1 names no option.
+    if isinstance(answer, str):
+        return ANSWER_MAPPING.get(answer.strip().upper(), -1)
+    if isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < len(ANSWER_MAPPING):
+        return answer
+    return -1
+
+# ----------------------------- Question Index ----------------------------- #
+# Everything send_quiz needs is computed once here, so picking a question is a
+# single random.choice over eligible_ids with no per-send filtering or copying.
+# A question is eligible only if Telegram would accept it as a quiz poll.
+# cluster_ids[question_id] names its near-duplicate cluster (see
+# question_dedup); a question nobody has clustered is a cluster of its own.
+# topic_ids[question_id] is its topic (see question_topics), and
+# topic_eligible_ids[topic_id] lists that topic's eligible questions.
+# generation names the bank file the index was read from (None if built in
+# memory), so per-chat rotation state can tell when the bank under it changed.
+
+def is_eligible(question):
+    return (question.word_count <= MAX_QUESTION_WORDS
+            and len(question.question) <= MAX_QUESTION_LENGTH
+            and MIN_OPTIONS <= len(question.options) <= MAX_OPTIONS
+            and 0 <= question.correct_option_id < len(question.options))
+
+def bank_generation(path):
+    # Names one version of a bank file, and stays the same across restarts.
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+def build_question_index(questions, rejected=0, cluster_ids=None, topic_ids=None, generation=None):
+    records = []
+    eligible_ids = array('i')
+    for question_id, q in enumerate(questions):
+        record = q if isinstance(q, Question) else Question.from_dict(q)
+        records.append(record)
+        if is_eligible(record):
+            eligible_ids.append(question_id)
+    if cluster_ids is None:
+        cluster_ids = range(len(records))
+    if topic_ids is None:
+        topic_ids = [classify_question(record.question) for record in records]
+    topic_ids = array('B', topic_ids)
+    topic_eligible_ids = [array('i') for _ in TOPICS]
+    for question_id in eligible_ids:
+        topic_eligible_ids[topic_ids[question_id]].append(question_id)
+    return {
+        "questions": records,
+        "eligible_ids": eligible_ids,
+        "cluster_ids": array('I', cluster_ids),
+        "topic_ids": topic_ids,
+        "topic_eligible_ids": topic_eligible_ids,
+        "topic_samplers": {},
+        "rejected": rejected,
+        "generation": generation,
+    }
+
+def set_topic_gauges(index):
+    for name, topic_eligible_ids in zip(TOPICS, index["topic_eligible_ids"]):
+        TOPIC_QUESTIONS.labels(name).set(len(topic_eligible_ids))
+
+def pick_question_id(index):
+    eligible_ids = index["eligible_ids"]
+    if not eligible_ids:
+        return None
+    return random.choice(eligible_ids)
+
+# ----------------------------- Per-Chat Rotation ----------------------------- #
+# Each chat walks the eligible questions in its own shuffled order without
+# repeats. Instead of storing the shuffled deck (or a "seen" set), a chat only
+# keeps a seed and a cursor: a keyed Feistel network permutes cursor positions
+# over the smallest power-of-four domain covering the deck, and cycle-walking
+# folds out-of-range values back in, so every pick is O(1) in time and memory.
+# That state only means something for the bank it was drawn from, so the chat
+# records the index's generation and starts over when a reload changes it.
+
+FEISTEL_ROUNDS = 4
+_HASH_MASK = (1 << 64) - 1
+
+def _feistel_round(value, seed, round_number):
+    x = (value ^ (seed << 8) ^ (round_number * 0x9E3779B97F4A7C15)) & _HASH_MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _HASH_MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _HASH_MASK
+    return x ^ (x >> 31)
+
+def shuffled_position(position, size, seed):
+    half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+    mask = (1 << half_bits) - 1
+    value = position
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ (_feistel_round(right, seed, round_number) & mask)
+        value = (left << half_bits) | right
+        if value < size:
+            return value
+
+def next_question_id(index, config):
+    generation = index.get("generation")
+    if config.get("quiz_generation") != generation:
+        # Stale deck positions and deferred ids could name other questions, or none.
+        config.update(quiz_seed=None, quiz_cursor=0, quiz_deck_size=None, quiz_deferred=[], topic_decks=None,
+                      recent_clusters=[], quiz_generation=generation)
+    eligible_ids = index["eligible_ids"]
+    size = len(eligible_ids)
+    if not size:
+        return None
+    cluster_ids = index["cluster_ids"]
+    recent = config.get("recent_clusters") or []
+    question_id = draw_topic_question_id(index, config, recent)
+    if question_id is None:
+        question_id = draw_spread_question_id(eligible_ids, size, config, cluster_ids, recent)
+    if QUIZ_CLUSTER_WINDOW:
+        config["recent_clusters"] = (recent + [cluster_ids[question_id]])[-QUIZ_CLUSTER_WINDOW:]
+    return question_id
+
+def draw_spread_question_id(eligible_ids, size, deck, cluster_ids, recent):
+    # Walk the deck past questions whose cluster the chat saw within the last
+    # QUIZ_CLUSTER_WINDOW quizzes, up to QUIZ_CLUSTER_SKIPS at a time. A skipped
+    # question is deferred, not dropped: it is served once its cluster has left
+    # the window, or before the deck starts over, so a pass still covers every
+    # question exactly once. At most QUIZ_CLUSTER_WINDOW questions wait at once.
+    deferred = deck.get("quiz_deferred") or []
+    if deck.get("quiz_deck_size") != size:
+        deferred = []
+    exhausted = deck.get("quiz_cursor", 0) >= size
+    for i, question_id in enumerate(deferred):
+        if exhausted or cluster_ids[question_id] not in recent:
+            deck["quiz_deferred"] = deferred[:i] + deferred[i + 1:]
+            return question_id
+    deferred = list(deferred)
+    question_id = draw_question_id(eligible_ids, size, deck)
+    for _ in range(QUIZ_CLUSTER_SKIPS):
+        if (cluster_ids[question_id] not in recent or len(deferred) >= QUIZ_CLUSTER_WINDOW
+                or deck["quiz_cursor"] >= size):
+            break
+        deferred.append(question_id)
+        question_id = draw_question_id(eligible_ids, size, deck)
+    deck["quiz_deferred"] = deferred
+    return question_id
+
+def draw_question_id(eligible_ids, size, config):
+    cursor = config.get("quiz_cursor", 0)
+    if config.get("quiz_seed") is None or config.get("quiz_deck_size") != size or cursor >= size:
+        # Start a fresh deck: first run, the bank changed, or the chat has seen every question.
+        config["quiz_seed"] = random.getrandbits(32)
+        config["quiz_deck_size"] = size
+        cursor = 0
+    config["quiz_cursor"] = cursor + 1
+    return eligible_ids[shuffled_position(cursor, size, config["quiz_seed"])]
+
+# ----------------------------- Topic Weights ----------------------------- #
+# A chat's topic_weights ({topic: weight}, missing topics weigh 1) make a topic
+# weight * size times as likely as with no weights at all, so equal weights
+# serve the bank exactly as the flat deck does and 0 switches a topic off. The
+# topic is drawn with Vose's alias method, O(1) per pick; each distinct weight
+# vector gets its table built once per index. Every topic keeps its own deck in
+# the chat's topic_decks, rotated like the flat one. The dicts are replaced,
+# never changed in place, so the chat store sees the change.
+
+def build_alias_table(weights):
+    """Return (probabilities, aliases) for Vose's alias method, or None if every weight is 0."""
+    total = sum(weights)
+    if total <= 0:
+        return None
+    count = len(weights)
+    probabilities = array('d', (weight * count / total for weight in weights))
+    aliases = array('B', range(count))
+    small = [i for i, p in enumerate(probabilities) if p < 1.0]
+    large = [i for i, p in enumerate(probabilities) if p >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        aliases[less] = more
+        probabilities[more] -= 1.0 - probabilities[less]
+        (small if probabilities[more] < 1.0 else large).append(more)
+    for i in small + large:
+        probabilities[i] = 1.0
+    return probabilities, aliases
+
+def pick_alias(table):
+    probabilities, aliases = table
+    i = random.randrange(len(probabilities))
+    return i if random.random() < probabilities[i] else aliases[i]
+
+def topic_sampler(index, topic_weights):
+    weights = tuple(max(0.0, float(topic_weights.get(name, 1))) for name in TOPICS)
+    samplers = index["topic_samplers"]
+    if weights not in samplers:
+        sizes = map(len, index["topic_eligible_ids"])
+        samplers[weights] = build_alias_table([weight * size for weight, size in zip(weights, sizes)])
+    return samplers[weights]
+
+def draw_topic_question_id(index, config, recent):
+    topic_weights = config.get("topic_weights")
+    if not topic_weights:
+        return None
+    table = topic_sampler(index, topic_weights)
+    if table is None:
+        return None
+    topic_id = pick_alias(table)
+    topic_eligible_ids = index["topic_eligible_ids"][topic_id]
+    decks = dict(config.get("topic_decks") or {})
+    deck = dict(decks.get(TOPICS[topic_id]) or {})
+    question_id = draw_spread_question_id(
+        topic_eligible_ids, len(topic_eligible_ids), deck, index["cluster_ids"], recent
+    )
+    decks[TOPICS[topic_id]] = deck
+    config["topic_decks"] = decks
+    return question_id
+
+# ----------------------------- Load Questions from JSON ----------------------------- #
+# The bank is streamed: records are decoded one at a time from a sliding window
+# of the file and turned into Question records straight away, so neither the
+# whole text nor a list of parsed dicts is ever held. Besides a JSON array, a
+# bank can be JSON Lines (one object per line, picked by a .jsonl name or a
+# first character of "{"), where a malformed line only rejects that record.
+
+READ_CHUNK_SIZE = 1 << 16
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    expect = "["
+    while True:
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            chunk = f.read(chunk_size)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+        if position == len(buffer):
+            raise ValueError("unexpected end of question bank")
+        char = buffer[position]
+        if expect == "[":
+            if char != "[":
+                raise ValueError("question bank is not a JSON array")
+            position += 1
+            expect = "value"
+            continue
+        if char == "]" and expect in ("value", ","):
+            return
+        if expect == ",":
+            if char != ",":
+                raise ValueError(f"expected ',' in question bank, got {char!r}")
+            position += 1
+            expect = "next"
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof or len(buffer) - position > MAX_RECORD_SIZE:
+                raise
+            # The record runs past the window; slide it and read more.
+            chunk = f.read(chunk_size)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+        yield record
+        position = end
+        expect = ","
+        if position >= chunk_size:
+            buffer, position = buffer[position:], 0
+
+def iter_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            logger.warning(f"Malformed question on line {line_number} skipped: {e}")
+            yield None
+
+def iter_question_records(f, path=""):
+    first = f.read(1)
+    while first and first.isspace():
+        first = f.read(1)
+    f.seek(0)
+    if path.endswith(".jsonl") or first == "{":
+        return iter_json_lines(f)
+    return iter_json_array(f)
+
+def is_valid_question(q):
+    return (isinstance(q, dict)
+            and isinstance(q.get("question"), str)
+            and isinstance(q.get("options"), list)
+            and all(isinstance(opt, str) for opt in q["options"])
+            and isinstance(q.get("answer", "A"), (str, int)))
+
+def load_questions(path=QUESTIONS_FILE):
+    try:
+        generation = bank_generation(path)
+        valid_questions = []
+        cluster_ids = array('I')
+        topic_ids = array('B')
+        rejected = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for q in iter_question_records(f, path):
+                try:
+                    question = Question.from_dict(q) if is_valid_question(q) else None
+                except Exception as e:
+                    logger.warning(f"Invalid question skipped ({e}): {q}")
+                    rejected += 1
+                    continue
+                if question is None:
+                    rejected += 1
+                    if q is not None:
+                        logger.warning(f"Invalid question format skipped: {q}")
+                    continue
+                cluster_id = q.get("cluster")
+                if not isinstance(cluster_id, int) or not 0 <= cluster_id <= len(valid_questions):
+                    cluster_id = len(valid_questions)
+                cluster_ids.append(cluster_id)
+                topic_ids.append(record_topic(q, q["question"]))
+                valid_questions.append(question)
+        logger.info(f"Loaded {len(valid_questions)} valid questions from {path}.")
+        return build_question_index(valid_questions, rejected=rejected, cluster_ids=cluster_ids, topic_ids=topic_ids,
+                                    generation=generation)
+    except Exception as e:
+        logger.error(f"Failed to load questions from {path}: {e}")
+        return build_question_index([])
+
+# ----------------------------- Binary Question Bank ----------------------------- #
+# questions.json stays the source; `python -m question_bank` compiles it into a
+# bank the bot maps read-only, so startup parses nothing, worker processes share
+# the page cache, and only the picked question is ever decoded. Layout, all
+# little-endian: a 16-byte header (magic, version, topic count, count, eligible
+# count), a table of count + 1 u64 record offsets, the u32 eligible ids, the
+# u32 cluster ids, the u8 topic ids, topic count + 1 u32 starts into the last
+# table, and the u32 eligible ids grouped by topic, each padded to 8 bytes, then
+# one record per question: correct option (-1 if the answer names none), option
+# count, word count, question length, the option lengths, and the UTF-8 text.
+
+BANK_MAGIC = b"QBNK"
+BANK_VERSION = 3
+BANK_HEADER = struct.Struct("<4sHHII")
+BANK_RECORD = struct.Struct("<bBHI")
+
+def encode_question(question):
+    options = [opt.encode('utf-8') for opt in question.options]
+    text = question.question.encode('utf-8')
+    return b"".join([
+        BANK_RECORD.pack(question.correct_option_id, len(options), min(question.word_count, 0xFFFF), len(text)),
+        struct.pack(f"<{len(options)}H", *map(len, options)),
+        text,
+        *options,
+    ])
+
+def padded_table(typecode, values):
+    data = array(typecode, values).tobytes()
+    return data + b"\0" * (-len(data) % 8)
+
+def compile_question_bank(index, path=QUESTIONS_BANK_FILE):
+    questions, eligible_ids = index["questions"], index["eligible_ids"]
+    records = [encode_question(question) for question in questions]
+    topic_starts = [0]
+    for topic_eligible_ids in index["topic_eligible_ids"]:
+        topic_starts.append(topic_starts[-1] + len(topic_eligible_ids))
+    tables = [
+        padded_table('I', eligible_ids),
+        padded_table('I', index["cluster_ids"]),
+        padded_table('B', index["topic_ids"]),
+        padded_table('I', topic_starts),
+        padded_table('I', [question_id for ids in index["topic_eligible_ids"] for question_id in ids]),
+    ]
+    offsets = array('Q')
+    position = BANK_HEADER.size + 8 * (len(records) + 1) + sum(map(len, tables))
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(BANK_HEADER.pack(BANK_MAGIC, BANK_VERSION, len(TOPICS), len(records), len(eligible_ids)))
+        f.write(offsets.tobytes())
+        for table in tables:
+            f.write(table)
+        for record in records:
+            f.write(record)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    return position
+
+class MappedQuestions:
+    """Read-only sequence of Question records decoded on access from a mapped bank."""
+
+    def __init__(self, buffer, count, offsets):
+        self.buffer = buffer
+        self.count = count
+        self.offsets = offsets
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, question_id):
+        if question_id < 0:
+            question_id += self.count
+        if not 0 <= question_id < self.count:
+            raise IndexError("question id out of range")
+        buffer = self.buffer
+        position = self.offsets[question_id]
+        correct_option_id, option_count, word_count, text_length = BANK_RECORD.unpack_from(buffer, position)
+        position += BANK_RECORD.size
+        lengths = struct.unpack_from(f"<{option_count}H", buffer, position)
+        position += 2 * option_count
+        text = buffer[position:position + text_length].decode('utf-8')
+        position += text_length
+        options = []
+        for length in lengths:
+            options.append(buffer[position:position + length].decode('utf-8'))
+            position += length
+        return Question(text, tuple(options), correct_option_id, word_count)
+
+    def __iter__(self):
+        for question_id in range(self.count):
+            yield self[question_id]
+
+def map_question_bank(path=QUESTIONS_BANK_FILE):
+    with open(path, 'rb') as f:
+        generation = bank_generation(path)
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, topic_count, count, eligible_count = BANK_HEADER.unpack_from(buffer, 0)
+    if magic != BANK_MAGIC or version != BANK_VERSION:
+        buffer.close()
+        raise ValueError(f"{path} is not a version {BANK_VERSION} question bank")
+    if topic_count != len(TOPICS):
+        buffer.close()
+        raise ValueError(f"{path} was compiled with {topic_count} topics, not {len(TOPICS)}")
+    view = memoryview(buffer)
+    position = BANK_HEADER.size
+
+    def table(typecode, length):
+        nonlocal position
+        size = struct.calcsize(typecode) * length
+        start, position = position, position + size + (-size % 8)
+        return view[start:start + size].cast(typecode)
+
+    offsets = table('Q', count + 1)
+    eligible_ids = table('I', eligible_count)
+    cluster_ids = table('I', count)
+    topic_ids = table('B', count)
+    topic_starts = table('I', topic_count + 1)
+    grouped_ids = table('I', eligible_count)
+    return {
+        "questions": MappedQuestions(buffer, count, offsets),
+        "eligible_ids": eligible_ids,
+        "cluster_ids": cluster_ids,
+        "topic_ids": topic_ids,
+        "topic_eligible_ids": [grouped_ids[topic_starts[i]:topic_starts[i + 1]] for i in range(topic_count)],
+        "topic_samplers": {},
+        "rejected": 0,
+        "generation": generation,
+    }
+
+def close_question_bank(index):
+    # Unmap a bank once nothing reads it any more. mmap refuses to close while
+    # a memoryview of it is alive, so the index's views are released first.
+    questions = index["questions"]
+    if not isinstance(questions, MappedQuestions):
+        return
+    for view in (questions.offsets, index["eligible_ids"], index["cluster_ids"], index["topic_ids"],
+                 *index["topic_eligible_ids"]):
+        view.release()
+    try:
+        questions.buffer.close()
+    except BufferError as e:
+        logger.warning(f"Question bank still in use, leaving it mapped: {e}")
+
+def load_question_bank(json_path=QUESTIONS_FILE, bank_path=QUESTIONS_BANK_FILE):
+    index = _load_question_bank(json_path, bank_path)
+    REJECTED.set(index["rejected"])
+    return index
+
+def _load_question_bank(json_path, bank_path):
+    # Use the compiled bank unless it is missing or older than its JSON source.
+    if os.path.exists(bank_path):
+        if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(bank_path):
+            logger.warning(f"{bank_path} is older than {json_path}; loading the JSON. Run python -m question_bank to rebuild.")
+        else:
+            try:
+                index = map_question_bank(bank_path)
+                logger.info(f"Mapped {len(index['questions'])} questions from {bank_path}.")
+                return index
+            except Exception as e:
+                logger.error(f"Failed to map {bank_path}, loading the JSON: {e}")
+    return load_questions(json_path)
+
+# ----------------------------- Hot Reload ----------------------------- #
+# Polls the (mtime, size) of questions.json and questions.bin and, once a change
+# has held still for a whole poll (so a half-written file is not picked up),
+# rebuilds the index on a worker thread. on_reload() then swaps it in with one
+# reference assignment, so a send in flight keeps the index it started with.
+# A rebuild that comes back empty is rejected and the current bank stays.
+
+def bank_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+class QuestionBankWatcher:
+    def __init__(self, on_reload, json_path=QUESTIONS_FILE, bank_path=QUESTIONS_BANK_FILE, interval=QUESTIONS_RELOAD_INTERVAL):
+        self.on_reload = on_reload
+        self.json_path = json_path
+        self.bank_path = bank_path
+        self.interval = interval
+        self.loaded = self.seen = bank_signature((json_path, bank_path))
+        self.task = None
+
+    async def check(self) -> bool:
+        signature = bank_signature((self.json_path, self.bank_path))
+        if signature == self.loaded or signature != self.seen:
+            self.seen = signature
+            return False
+        self.loaded = signature
+        return await self.reload()
+
+    async def reload(self) -> bool:
+        start = time.perf_counter()
+        index = await asyncio.to_thread(load_question_bank, self.json_path, self.bank_path)
+        elapsed = time.perf_counter() - start
+        RELOAD_SECONDS.observe(elapsed)
+        if not len(index["questions"]):
+            RELOADS.labels("empty").inc()
+            logger.error("Reloaded question bank has no valid questions; keeping the current one.")
+            return False
+        self.on_reload(index)
+        RELOADS.labels("ok").inc()
+        QUESTIONS.set(len(index["questions"]))
+        set_topic_gauges(index)
+        logger.info(f"Reloaded {len(index['questions'])} questions in {elapsed:.2f}s ({index['rejected']} rejected).")
+        return True
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                RELOADS.labels("error").inc()
+                logger.error(f"Question bank reload failed: {e}")
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    source = sys.argv[1] if len(sys.argv) > 1 else QUESTIONS_FILE
+    target = sys.argv[2] if len(sys.argv) > 2 else QUESTIONS_BANK_FILE
+    written = compile_question_bank(load_questions(source), target)
+    logger.info(f"Compiled {source} into {target} ({written} bytes).")
@@ -0,0 +1,110 @@
+import argparse
+import logging
+import re
+import zlib
+from array import array
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_BINS = 32
+LSH_BANDS = 8
+LSH_ROWS = SIGNATURE_BINS // LSH_BANDS
+DUPLICATE_THRESHOLD = 0.6
+
+# ----------------------------- Near-Duplicate Clusters ----------------------------- #
+# Paraphrased questions share most of their words, so a question is reduced to
+# the set of words in it and its options, and two questions whose sets overlap
+# by DUPLICATE_THRESHOLD (Jaccard) or more land in one cluster.
+#
+# Signatures are one-permutation MinHash: every word is hashed once, its hash
+# picks one of SIGNATURE_BINS bins and each bin keeps its smallest value; empty
+# bins borrow from the next filled one (densification). LSH then splits the
+# signature into LSH_BANDS bands of LSH_ROWS bins. Band by band, a question is
+# compared only with the first question seen with the same band values, so the
+# whole pass is linear in the bank, and the estimated similarity is checked
+# before two clusters are merged. A cluster is named by its lowest question id.
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from his her in is it its of on or that the their this to was what which "
+    "who with".split()
+)
+WORD = re.compile(r"\w+")
+_DENSIFY_STEP = 0x9E3779B1
+
+def question_words(question, options):
+    text = " ".join([question, *options]).casefold()
+    return {word for word in WORD.findall(text) if word not in STOP_WORDS}
+
+def minhash_signature(words):
+    bins = [None] * SIGNATURE_BINS
+    for word in words:
+        h = zlib.crc32(word.encode("utf-8"))
+        slot, value = h % SIGNATURE_BINS, h // SIGNATURE_BINS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    signature = array('I', bytes(4 * SIGNATURE_BINS))
+    if not words:
+        return signature.tobytes()
+    for slot in range(SIGNATURE_BINS):
+        source, distance = slot, 0
+        while bins[source] is None:
+            source = (source + 1) % SIGNATURE_BINS
+            distance += 1
+        signature[slot] = (bins[source] + distance * _DENSIFY_STEP) & 0xFFFFFFFF
+    return signature.tobytes()
+
+def signature_similarity(a, b):
+    a, b = array('I', a), array('I', b)
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_BINS
+
+def cluster_signatures(signatures, threshold=DUPLICATE_THRESHOLD):
+    """Return an array giving each question's cluster id (its cluster's lowest question id)."""
+    parent = array('I', range(len(signatures)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    band_bytes = 4 * LSH_ROWS
+    for band in range(LSH_BANDS):
+        # One band's buckets at a time keeps memory at one dict over the bank.
+        first_seen = {}
+        start, end = band * band_bytes, (band + 1) * band_bytes
+        for question_id, signature in enumerate(signatures):
+            other = first_seen.setdefault(signature[start:end], question_id)
+            if other == question_id:
+                continue
+            a, b = find(question_id), find(other)
+            if a != b and signature_similarity(signature, signatures[other]) >= threshold:
+                parent[max(a, b)] = min(a, b)
+    return array('I', (find(question_id) for question_id in range(len(signatures))))
+
+def cluster_questions(questions, threshold=DUPLICATE_THRESHOLD):
+    return cluster_signatures(
+        [minhash_signature(question_words(q.question, q.options)) for q in questions], threshold
+    )
+
+def main():
+    from question_bank import QUESTIONS_FILE, load_questions
+    parser = argparse.ArgumentParser(description="List near-duplicate question clusters in a bank.")
+    parser.add_argument("source", nargs="?", default=QUESTIONS_FILE)
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    questions = load_questions(args.source)["questions"]
+    clusters = defaultdict(list)
+    for question_id, cluster_id in enumerate(cluster_questions(questions, args.threshold)):
+        clusters[cluster_id].append(question_id)
+    duplicates = sorted((members for members in clusters.values() if len(members) > 1), key=len, reverse=True)
+    logger.info(f"{len(questions)} questions, {len(clusters)} clusters; "
+                f"{sum(map(len, duplicates))} questions in {len(duplicates)} near-duplicate clusters.")
+    for members in duplicates:
+        logger.info(f"cluster {members[0]}:")
+        for question_id in members:
+            logger.info(f"  {question_id}: {questions[question_id].question}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+
+from question_bank import (
+    MAX_OPTION_LENGTH,
+    MAX_OPTIONS,
+    MAX_QUESTION_LENGTH,
+    MAX_QUESTION_WORDS,
+    MIN_OPTIONS,
+    QUESTIONS_BANK_FILE,
+    QUESTIONS_FILE,
+    Question,
+    answer_option_id,
+    build_question_index,
+    compile_question_bank,
+    iter_question_records,
+)
+from question_dedup import DUPLICATE_THRESHOLD, cluster_signatures, minhash_signature, question_words
+from question_topics import TOPIC_IDS, TOPICS, record_topic
+
+logger = logging.getLogger(__name__)
+
+REPORT_FILE = 'questions.rejected.jsonl'
+PIPELINE_BATCH_SIZE = 1000
+
+# ----------------------------- Question Pipeline ----------------------------- #
+# Offline cleanup of the question bank, run before it is compiled. Worker
+# processes normalise each record (NFC, collapsed whitespace, trimmed keys,
+# answer as a letter), truncate over-long options, reject anything Telegram
+# would refuse as a quiz poll, with a reason, classify the rest into topics and
+# sign them for near-duplicate clustering. The parent streams the results in
+# input order, drops exact duplicates, clusters the near-duplicates
+# (question_dedup), writes questions.bin (and optionally the cleaned JSON, with
+# each record's topic and cluster), and reports every rejected record.
+#
+#     python -m question_pipeline [questions.json] [--bank questions.bin] [--threshold 0.6]
+#         [--output questions.clean.json] [--report questions.rejected.jsonl] [--workers N]
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def truncate_option(option):
+    if len(option) <= MAX_OPTION_LENGTH:
+        return option
+    return option[:MAX_OPTION_LENGTH - 1].rstrip() + "…"
+
+def normalize_record(raw):
+    """Return (record, None, truncated) for a usable question, or (None, reason, 0)."""
+    if not isinstance(raw, dict):
+        return None, "not_an_object", 0
+    fields = {str(key).strip().lower(): value for key, value in raw.items()}
+    question, options = fields.get("question"), fields.get("options")
+    if not isinstance(question, str) or not normalize_text(question):
+        return None, "missing_question", 0
+    if not isinstance(options, list):
+        return None, "missing_options", 0
+    question = normalize_text(question)
+    if len(question) > MAX_QUESTION_LENGTH:
+        return None, "question_too_long", 0
+    if len(question.split()) > MAX_QUESTION_WORDS:
+        return None, "question_too_many_words", 0
+    if not MIN_OPTIONS <= len(options) <= MAX_OPTIONS:
+        return None, "bad_option_count", 0
+    if not all(isinstance(option, str) for option in options):
+        return None, "option_not_text", 0
+    options = [normalize_text(option) for option in options]
+    if not all(options):
+        return None, "empty_option", 0
+    truncated = sum(len(option) > MAX_OPTION_LENGTH for option in options)
+    options = [truncate_option(option) for option in options]
+    option_id = answer_option_id(fields.get("answer", "A"))
+    if not 0 <= option_id < len(options):
+        return None, "bad_answer", 0
+    record = {"question": question, "options": options, "answer": chr(ord("A") + option_id)}
+    record["topic"] = TOPICS[record_topic(fields, question)]
+    return record, None, truncated
+
+def duplicate_key(record):
+    text = "\x1f".join([record["question"], *record["options"]]).casefold()
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def normalize_batch(batch):
+    start, records = batch
+    results = []
+    for position, raw in enumerate(records, start):
+        record, reason, truncated = normalize_record(raw)
+        key = signature = None
+        if record is not None:
+            key = duplicate_key(record)
+            signature = minhash_signature(question_words(record["question"], record["options"]))
+        results.append((position, raw, record, reason, truncated, key, signature))
+    return results
+
+def iter_batches(records, batch_size=PIPELINE_BATCH_SIZE):
+    start = 0
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield start, batch
+        start += len(batch)
+
+def write_questions(path, questions, topic_ids, cluster_ids):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for question_id, question in enumerate(questions):
+            record = {
+                "question": question.question,
+                "options": list(question.options),
+                "answer": chr(ord("A") + question.correct_option_id),
+                "topic": TOPICS[topic_ids[question_id]],
+                "cluster": cluster_ids[question_id],
+            }
+            f.write(("," if question_id else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+        f.write("\n]\n")
+
+def run_pipeline(source=QUESTIONS_FILE, bank=QUESTIONS_BANK_FILE, output=None, report=REPORT_FILE, workers=None,
+                 threshold=DUPLICATE_THRESHOLD):
+    stats = Counter()
+    seen = set()
+    questions = []
+    topic_ids = []
+    signatures = []
+    with open(source, 'r', encoding='utf-8') as f, open(report, 'w', encoding='utf-8') as rejected, \
+            Pool(workers) as pool:
+        for results in pool.imap(normalize_batch, iter_batches(iter_question_records(f, source))):
+            for position, raw, record, reason, truncated, key, signature in results:
+                stats["read"] += 1
+                if record is not None and key in seen:
+                    reason = "duplicate"
+                if reason is not None:
+                    stats[f"rejected_{reason}"] += 1
+                    rejected.write(json.dumps({"position": position, "reason": reason, "record": raw}, ensure_ascii=False) + "\n")
+                    continue
+                seen.add(key)
+                stats["kept"] += 1
+                stats["truncated_options"] += truncated
+                questions.append(Question.from_dict(record))
+                topic_ids.append(TOPIC_IDS[record["topic"]])
+                stats[f"topic_{record['topic']}"] += 1
+                signatures.append(signature)
+    cluster_ids = cluster_signatures(signatures, threshold)
+    del signatures
+    stats["clusters"] = len(set(cluster_ids))
+    if output:
+        write_questions(output, questions, topic_ids, cluster_ids)
+    if bank:
+        compile_question_bank(build_question_index(questions, cluster_ids=cluster_ids, topic_ids=topic_ids), bank)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate, normalise and deduplicate a question bank, then compile it.")
+    parser.add_argument("source", nargs="?", default=QUESTIONS_FILE)
+    parser.add_argument("--bank", default=QUESTIONS_BANK_FILE, help="compiled bank to write ('' to skip)")
+    parser.add_argument("--output", help="also write the cleaned questions as JSON")
+    parser.add_argument("--report", default=REPORT_FILE, help="JSON Lines report of rejected records")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help="word-set similarity at which questions count as near-duplicates")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stats = run_pipeline(args.source, args.bank or None, args.output, args.report, args.workers, args.threshold)
+    rejected = sum(count for name, count in stats.items() if name.startswith("rejected_"))
+    logger.info(f"Read {stats['read']} questions: kept {stats['kept']} in {stats['clusters']} clusters, "
+                f"rejected {rejected}, truncated {stats['truncated_options']} options.")
+    logger.info("By topic: " + ", ".join(f"{name} {stats[f'topic_{name}']}" for name in TOPICS))
+    for name, count in sorted(stats.items()):
+        if name.startswith("rejected_"):
+            logger.info(f"  {name[len('rejected_'):]}: {count}")
+    if rejected:
+        logger.info(f"Rejected records are listed in {args.report}.")
+
+if __name__ == '__main__':
+    main()
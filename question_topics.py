@@ -0,0 +1,51 @@
+import re
+
+# ----------------------------- Question Topics ----------------------------- #
+# Every question gets one topic when the index is built, so picking by topic at
+# send time is an array lookup, never a scan of the bank. A record can name its
+# topic with a "topic" field; otherwise the first TOPIC_PATTERNS entry matching
+# its question text decides, and anything unmatched is "general". A topic id is
+# its position in TOPICS, so new topics go at the end, before "general".
+
+TOPICS = ("openings", "endgames", "tactics", "strategy", "history", "general")
+TOPIC_LABELS = {
+    "openings": "♟️ Openings",
+    "endgames": "🏁 Endgames",
+    "tactics": "⚔️ Tactics",
+    "strategy": "🧭 Strategy",
+    "history": "📜 History & Players",
+    "general": "🧠 General",
+}
+TOPIC_IDS = {name: topic_id for topic_id, name in enumerate(TOPICS)}
+GENERAL_TOPIC = TOPIC_IDS["general"]
+
+TOPIC_PATTERNS = [
+    ("openings", r"opening|defen[cs]e|gambit|variation|sicilian|najdorf|berlin|ruy lopez|italian game|caro|scandinavian"
+                 r"|gr[üu]nfeld|catalan|benoni|dutch|slav\b|nimzo|pirc|alekhine|english|london system"
+                 r"|king.s indian|queen.s indian|benko|vienna|scotch|petrov|evans|fianchetto|\b1\.\s?[a-h]\d"),
+    ("history", r"world champion\w*|championship|famous|legendary|olympiad|fide|century|\b1[5-9]\d\d\b|\b20\d\d\b"
+                r"|\bwho (?:was|is|won|became|played|invented)\b|kasparov|karpov|fischer|carlsen|capablanca"
+                r"|botvinnik|spassky|morphy|steinitz|lasker|anand|petrosian|smyslov|euwe|kramnik|polgar|nakamura"
+                r"|caruana|nimzowitsch|tarrasch|rubinstein|\bwhich (?:player|grandmaster)\b|\bquote"),
+    ("endgames", r"endgame|ending|lucena|philidor position|opposition|zugzwang|triangulation|passed pawn|king and pawn"
+                 r"|stalemate|tablebase|rule of the square|promot\w+"),
+    ("tactics", r"tactic\w*|\bfork|\bpin\b|pinned|skewer|deflection|decoy|discovered|double check|sacrific\w*|combination"
+                r"|\bmate\b|checkmate|mating|interference|overload\w*|x-ray|zwischenzug|intermezzo|desperado"
+                r"|clearance|windmill|smothered|back[- ]rank"),
+    ("strategy", r"structure|positional|initiative|bishop pair|outpost|weak square|isolated|backward|doubled|open file"
+                 r"|minority attack|prophylaxis|\bspace\b|tempo|tempi|development|cent(?:er|re)|\bplan|strateg\w*"
+                 r"|imbalance|pawn chain|majority|pawn break|tension|blockade|bad bishop|good bishop|piece activity"
+                 r"|coordination|closed position|open position"),
+]
+_TOPIC_PATTERNS = [(TOPIC_IDS[name], re.compile(pattern, re.IGNORECASE)) for name, pattern in TOPIC_PATTERNS]
+
+def classify_question(text):
+    for topic_id, pattern in _TOPIC_PATTERNS:
+        if pattern.search(text):
+            return topic_id
+    return GENERAL_TOPIC
+
+def record_topic(record, text):
+    """Topic id for a parsed record: its own "topic" field if it names one, else classify_question(text)."""
+    topic_id = TOPIC_IDS.get(str(record.get("topic", "")).strip().lower())
+    return classify_question(text) if topic_id is None else topic_id
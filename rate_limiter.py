@@ -0,0 +1,159 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SCHEDULED = 1
+LANES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_SCHEDULED: "scheduled"}
+
+current_priority = ContextVar("current_priority", default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def priority_lane(priority):
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+# ----------------------------- Token Bucket ----------------------------- #
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        self.refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def reserve(self, now):
+        # Take a token even if that puts the bucket into debt; the caller sleeps
+        # off the returned delay, so concurrent callers queue up in arrival order.
+        wait = self.delay(now)
+        self.tokens -= 1
+        return wait
+
+    def idle(self, now):
+        self.refill(now)
+        return self.tokens >= self.capacity and self.paused_until <= now
+
+# ----------------------------- Rate Limiter ----------------------------- #
+# Every outbound call first waits on its chat's bucket (so one busy group never
+# holds up the others), then joins a single priority queue for the global
+# bucket, where interactive callbacks always go ahead of scheduled quizzes.
+# Everything runs on the bot's event loop, so no locks are needed.
+
+class RateLimiter:
+    def __init__(self, global_rate=30, global_burst=30, chat_rate=20 / 60, chat_burst=20, max_chat_buckets=10000):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = {}
+        self.max_chat_buckets = max_chat_buckets
+        self.waiting = []
+        self.counter = itertools.count()
+        self.wake_handle = None
+        self.stats = {
+            lane: {"queue_depth": 0, "calls": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+            for lane in LANES.values()
+        }
+        self.stats["retry_after"] = {"count": 0, "seconds_total": 0.0}
+
+    def chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.max_chat_buckets:
+                self.sweep_chat_buckets()
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def sweep_chat_buckets(self):
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self.chat_buckets.items() if bucket.idle(now)]:
+            del self.chat_buckets[chat_id]
+        self.max_chat_buckets = max(self.max_chat_buckets, 2 * len(self.chat_buckets))
+
+    async def acquire(self, chat_id=None, priority=PRIORITY_INTERACTIVE, per_chat=True):
+        start = time.monotonic()
+        wait = 0.0
+        if per_chat and chat_id is not None:
+            wait = self.chat_bucket(chat_id).reserve(start)
+        elif chat_id is not None and chat_id in self.chat_buckets:
+            # No per-chat token for this endpoint, but a RetryAfter pause on the chat still holds.
+            wait = max(0.0, self.chat_buckets[chat_id].paused_until - start)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.acquire_global(priority)
+        waited = time.monotonic() - start
+        lane = self.stats[LANES[priority]]
+        lane["calls"] += 1
+        lane["wait_seconds_total"] += waited
+        lane["wait_seconds_max"] = max(lane["wait_seconds_max"], waited)
+        return waited
+
+    async def acquire_global(self, priority):
+        if not self.waiting and self.global_bucket.delay(time.monotonic()) <= 0:
+            self.global_bucket.tokens -= 1
+            return
+        lane = self.stats[LANES[priority]]
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.counter), future))
+        lane["queue_depth"] += 1
+        self.schedule_wake()
+        try:
+            await future
+        finally:
+            # A cancelled waiter stays in the heap until wake() skips over it.
+            lane["queue_depth"] -= 1
+
+    def schedule_wake(self, delay=0.0):
+        if self.wake_handle is not None:
+            self.wake_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self.wake_handle = loop.call_later(delay, self.wake) if delay > 0 else loop.call_soon(self.wake)
+
+    def wake(self):
+        self.wake_handle = None
+        while self.waiting:
+            future = self.waiting[0][2]
+            if future.done():
+                heapq.heappop(self.waiting)
+                continue
+            wait = self.global_bucket.delay(time.monotonic())
+            if wait > 0:
+                self.schedule_wake(wait)
+                return
+            heapq.heappop(self.waiting)
+            self.global_bucket.tokens -= 1
+            future.set_result(None)
+
+    def pause(self, seconds, chat_id=None):
+        # Telegram answered 429 with retry_after: hold back that chat, or
+        # everything when the flood limit was not tied to a chat.
+        until = time.monotonic() + seconds
+        self.stats["retry_after"]["count"] += 1
+        self.stats["retry_after"]["seconds_total"] += seconds
+        if chat_id is not None:
+            bucket = self.chat_bucket(chat_id)
+            bucket.paused_until = max(bucket.paused_until, until)
+        else:
+            self.global_bucket.paused_until = max(self.global_bucket.paused_until, until)
+            if self.waiting:
+                self.schedule_wake(seconds)
+
+    def metrics(self):
+        return {key: dict(value) for key, value in self.stats.items()}
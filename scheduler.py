@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import time
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUIZ_INTERVAL = int(os.environ.get("QUIZ_INTERVAL", 1800))
+QUIZ_WORKERS = int(os.environ.get("QUIZ_WORKERS", 8))
+QUIZ_BATCH_SIZE = int(os.environ.get("QUIZ_BATCH_SIZE", 500))
+QUIZ_CONCURRENCY = int(os.environ.get("QUIZ_CONCURRENCY", 128))
+
+DISPATCH_LAG = REGISTRY.histogram(
+    "quizbot_dispatch_lag_seconds", "Delay from a quiz's scheduled time to the start of its send.",
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+
+# ----------------------------- Staggered Phases ----------------------------- #
+# Each chat fires at a fixed offset into the wall-clock interval derived from
+# its id, so restarts never line every chat up at t=0 and new chats spread out
+# on their own. Fibonacci hashing keeps the offsets even for clustered ids.
+
+_GOLDEN_RATIO_64 = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+
+def quiz_phase(chat_id: int, interval=QUIZ_INTERVAL) -> float:
+    return ((int(chat_id) * _GOLDEN_RATIO_64) & _MASK_64) / 2 ** 64 * interval
+
+# ----------------------------- Quiz Dispatcher ----------------------------- #
+# One timing wheel replaces a JobQueue job per chat. Every chat repeats with the
+# same period, so a single level of interval/tick slots is enough: a chat lives
+# in the slot of its phase, and each tick drains the slots that have come due
+# since the last one and queues them, in batches, for a fixed set of worker
+# tasks. Adding, removing and dispatching a chat are all O(1). drained_until is
+# the wall-clock end of the last slot drained: a tick before it (an early
+# wake-up in the same slot, or the clock stepping back) drains nothing, so the
+# wheel is never walked round twice in one interval.
+#
+# A chat sent a quiz right away (send_now) still lives in its slot, so its next
+# firing is skipped if it comes due within half an interval of that quiz.
+#
+# A worker fans a batch out: every chat in it is sent concurrently, with at most
+# QUIZ_CONCURRENCY sends in flight across all workers. Each chat's own calls
+# (send, then pin) stay in order inside its send coroutine, and a chat is never
+# sent twice at once. Batches carry the wall-clock time their slot came due, so
+# the lag until each send actually starts can be measured.
+
+class QuizDispatcher:
+    def __init__(self, send, interval=QUIZ_INTERVAL, tick=1.0, workers=QUIZ_WORKERS, batch_size=QUIZ_BATCH_SIZE,
+                 concurrency=QUIZ_CONCURRENCY):
+        self.send = send
+        self.interval = interval
+        self.tick_seconds = tick
+        self.slots = [set() for _ in range(max(1, int(interval / tick)))]
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue()
+        self.concurrency = asyncio.Semaphore(concurrency)
+        self.in_flight = set()
+        self.next_slot = None
+        self.drained_until = None
+        self.held = {}
+        self.tasks = []
+        self.stats = {
+            "chats": 0,
+            "ticks": 0,
+            "dispatched": 0,
+            "last_tick_seconds": 0.0,
+            "max_tick_seconds": 0.0,
+            "lag_seconds": 0.0,
+            "batches": 0,
+            "skipped_in_flight": 0,
+            "skipped_recent": 0,
+            "last_batch_seconds": 0.0,
+            "max_batch_seconds": 0.0,
+        }
+
+    def slot_of(self, chat_id: int) -> int:
+        return int(quiz_phase(chat_id, self.interval) / self.tick_seconds) % len(self.slots)
+
+    def add(self, chat_id: int) -> None:
+        slot = self.slots[self.slot_of(chat_id)]
+        if chat_id not in slot:
+            slot.add(chat_id)
+            self.stats["chats"] += 1
+
+    def remove(self, chat_id: int) -> None:
+        slot = self.slots[self.slot_of(chat_id)]
+        if chat_id in slot:
+            slot.discard(chat_id)
+            self.stats["chats"] -= 1
+        self.held.pop(chat_id, None)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self.slots[self.slot_of(chat_id)]
+
+    def slot_time(self, slot: int, now: float) -> float:
+        start = now - now % self.interval + slot * self.tick_seconds
+        return start if start <= now else start - self.interval
+
+    def send_now(self, chat_id: int, now=None) -> None:
+        if now is None:
+            now = time.time()
+        self.held[chat_id] = now + self.interval / 2
+        self.queue.put_nowait((now, [chat_id]))
+
+    def is_held(self, chat_id: int, scheduled_at: float) -> bool:
+        # Only the first firing after send_now can be too close to it.
+        until = self.held.pop(chat_id, None)
+        return until is not None and scheduled_at < until
+
+    def tick(self, now=None) -> int:
+        if now is None:
+            now = time.time()
+        if self.drained_until is not None and now < self.drained_until:
+            if self.drained_until - now < self.interval:
+                return 0
+            # The clock went back more than a whole interval; start over from here.
+            logger.warning(f"Clock stepped back {self.drained_until - now:.0f}s; resyncing the quiz wheel.")
+            self.next_slot = None
+        start = time.perf_counter()
+        current = int((now % self.interval) / self.tick_seconds) % len(self.slots)
+        if self.next_slot is None:
+            self.next_slot = current
+        self.drained_until = now - now % self.tick_seconds + self.tick_seconds
+        dispatched = 0
+        # The first slot drained is the oldest, so it is the furthest overdue.
+        self.stats["lag_seconds"] = now - self.slot_time(self.next_slot, now)
+        # Catch up on any slots skipped while the previous tick ran late.
+        while True:
+            due = list(self.slots[self.next_slot])
+            scheduled_at = self.slot_time(self.next_slot, now)
+            if due and self.held:
+                kept = [chat_id for chat_id in due if not self.is_held(chat_id, scheduled_at)]
+                self.stats["skipped_recent"] += len(due) - len(kept)
+                due = kept
+            if due:
+                for i in range(0, len(due), self.batch_size):
+                    self.queue.put_nowait((scheduled_at, due[i:i + self.batch_size]))
+                dispatched += len(due)
+            done = self.next_slot == current
+            self.next_slot = (self.next_slot + 1) % len(self.slots)
+            if done:
+                break
+        elapsed = time.perf_counter() - start
+        self.stats["ticks"] += 1
+        self.stats["dispatched"] += dispatched
+        self.stats["last_tick_seconds"] = elapsed
+        self.stats["max_tick_seconds"] = max(self.stats["max_tick_seconds"], elapsed)
+        return dispatched
+
+    async def send_one(self, chat_id: int, scheduled_at: float) -> None:
+        if chat_id in self.in_flight:
+            self.stats["skipped_in_flight"] += 1
+            return
+        self.in_flight.add(chat_id)
+        try:
+            async with self.concurrency:
+                DISPATCH_LAG.observe(max(0.0, time.time() - scheduled_at))
+                await self.send(chat_id)
+        except Exception as e:
+            logger.error(f"Quiz dispatch failed for chat {chat_id}: {e}")
+        finally:
+            self.in_flight.discard(chat_id)
+
+    async def fan_out(self, chat_ids, scheduled_at=None) -> float:
+        if scheduled_at is None:
+            scheduled_at = time.time()
+        start = time.perf_counter()
+        await asyncio.gather(*(self.send_one(chat_id, scheduled_at) for chat_id in chat_ids))
+        elapsed = time.perf_counter() - start
+        self.stats["batches"] += 1
+        self.stats["last_batch_seconds"] = elapsed
+        self.stats["max_batch_seconds"] = max(self.stats["max_batch_seconds"], elapsed)
+        if len(chat_ids) > 1:
+            logger.info(f"Sent quiz batch of {len(chat_ids)} chats in {elapsed:.2f}s.")
+        return elapsed
+
+    async def worker(self) -> None:
+        while True:
+            scheduled_at, chat_ids = await self.queue.get()
+            try:
+                await self.fan_out(chat_ids, scheduled_at)
+            finally:
+                self.queue.task_done()
+
+    async def run(self) -> None:
+        while True:
+            self.tick(time.time())
+            await asyncio.sleep(self.tick_seconds - time.time() % self.tick_seconds)
+
+    def start(self) -> None:
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.run()))
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
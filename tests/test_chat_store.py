@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+
+from chat_store import JournalChatConfigStore, default_chat_config
+
+
+def open_store(tmp_path, **kwargs):
+    store = JournalChatConfigStore(
+        journal_path=str(tmp_path / "chat_config.journal"),
+        snapshot_path=str(tmp_path / "chat_config.snapshot.json"),
+        legacy_path=str(tmp_path / "chat_config.json"),
+        **kwargs,
+    )
+    store.load()
+    return store
+
+
+def chat(language="English", auto_delete=True, auto_pin=False):
+    return dict(default_chat_config(), language=language, auto_delete=auto_delete, auto_pin=auto_pin)
+
+
+def test_journal_survives_restart(tmp_path):
+    store = open_store(tmp_path)
+    store.save("1", chat("Hindi"))
+    config = dict(store.get("1"), auto_pin=True)
+    store.save("1", config)
+    store.save("2", chat(auto_delete=False))
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.get("1") == chat("Hindi", auto_pin=True)
+    assert store.get("2") == chat(auto_delete=False)
+    store.close()
+
+
+def test_compaction_keeps_state_and_later_records(tmp_path):
+    store = open_store(tmp_path, compact_bytes=1)
+    for i in range(50):
+        store.save(str(i), chat())
+    store.flush()
+    assert store.stats["compactions"] == 1
+    assert (tmp_path / "chat_config.journal").stat().st_size == 0
+    store.save("0", chat("Hindi"))
+    store.close()
+
+    store = open_store(tmp_path)
+    assert len(store.configs) == 50
+    assert store.get("0") == chat("Hindi")
+    store.close()
+
+
+def test_legacy_file_migrates_and_survives_restart(tmp_path):
+    legacy = {
+        "1": chat("Hindi", auto_delete=False, auto_pin=True),
+        "2": chat(auto_pin=True),
+        "3": dict(chat(), active=False),
+    }
+    (tmp_path / "chat_config.json").write_text(json.dumps(legacy), encoding="utf-8")
+    store = open_store(tmp_path)
+    assert not (tmp_path / "chat_config.json").exists()
+    assert (tmp_path / "chat_config.json.migrated").exists()
+    store.save("1", dict(store.get("1"), last_quiz_id=7))
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.get("1") == dict(legacy["1"], last_quiz_id=7)
+    assert store.get("2") == legacy["2"]
+    assert store.get("3") == legacy["3"]
+    store.close()
+
+
+def test_saves_during_a_compaction_are_kept(tmp_path, monkeypatch):
+    store = open_store(tmp_path, compact_bytes=1)
+    store.save("1", chat())
+    snapshot_started, release = threading.Event(), threading.Event()
+    write_snapshot = store.write_snapshot
+
+    def slow_snapshot(seq, chats):
+        snapshot_started.set()
+        release.wait(5)
+        return write_snapshot(seq, chats)
+
+    monkeypatch.setattr(store, "write_snapshot", slow_snapshot)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert snapshot_started.wait(5)
+    # save() must not wait for the snapshot to be written.
+    store.save("2", chat("Hindi"))
+    release.set()
+    flusher.join(5)
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.get("1") == chat()
+    assert store.get("2") == chat("Hindi")
+    store.close()
+
+
+def test_a_crash_before_the_journal_swap_loses_nothing(tmp_path, monkeypatch):
+    store = open_store(tmp_path, compact_bytes=1)
+    for i in range(10):
+        store.save(str(i), chat())
+    store.save("3", chat("Hindi"))
+    replace = os.replace
+
+    def crash_on_journal(src, dst):
+        if dst.endswith(".journal"):
+            raise OSError("crashed")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", crash_on_journal)
+    store.flush()
+    assert store.stats["flush_errors"] == 1
+    monkeypatch.setattr(os, "replace", replace)
+
+    restarted = open_store(tmp_path)
+    assert len(restarted.configs) == 10
+    assert restarted.get("3") == chat("Hindi")
+    restarted.close()
+    store.close()
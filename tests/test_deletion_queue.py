@@ -0,0 +1,75 @@
+import asyncio
+import json
+import time
+
+from deletion_queue import DeletionQueue
+
+
+class FakeDelete:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    async def __call__(self, chat_id, message_ids):
+        self.calls.append((time.monotonic(), chat_id, list(message_ids)))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("timed out")
+
+
+async def drain(queue, until, timeout=5):
+    queue.task = asyncio.create_task(queue.run())
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+
+def test_drains_chat_by_chat_in_batches_at_the_set_rate(tmp_path):
+    delete = FakeDelete()
+    queue = DeletionQueue(delete, path=str(tmp_path / "pending_deletions.json"), rate=20, batch_size=2)
+    for message_id in range(5):
+        queue.add(1, message_id)
+    queue.add(2, 100)
+    asyncio.run(drain(queue, lambda: queue.stats["deleted"] == 6))
+
+    assert [(chat_id, ids) for _, chat_id, ids in delete.calls] == [
+        (1, [0, 1]), (2, [100]), (1, [2, 3]), (1, [4]),
+    ]
+    gaps = [b[0] - a[0] for a, b in zip(delete.calls, delete.calls[1:])]
+    assert min(gaps) >= 0.04
+    assert queue.pending() == []
+
+
+def test_failed_deletions_back_off_then_give_up(tmp_path):
+    delete = FakeDelete(failures=10)
+    queue = DeletionQueue(delete, path=str(tmp_path / "pending_deletions.json"), rate=1000,
+                          retry_delay=0.05, max_attempts=3)
+    queue.add(1, 7)
+    asyncio.run(drain(queue, lambda: queue.stats["dropped"] == 1))
+
+    assert len(delete.calls) == 4
+    gaps = [b[0] - a[0] for a, b in zip(delete.calls, delete.calls[1:])]
+    assert gaps[0] >= 0.05 and gaps[1] >= 0.1 and gaps[2] >= 0.2
+    assert queue.stats["retries"] == 3
+    assert queue.pending() == [] and queue.attempts == {}
+
+
+def test_pending_deletions_survive_a_restart(tmp_path):
+    path = tmp_path / "pending_deletions.json"
+
+    async def stop_with_work_left():
+        queue = DeletionQueue(FakeDelete(failures=1), path=str(path), rate=1, retry_delay=60)
+        queue.add(1, 10)
+        queue.add(2, 20)
+        queue.add(2, 21)
+        await drain(queue, lambda: queue.stats["retries"] == 1)
+        return queue
+
+    queue = asyncio.run(stop_with_work_left())
+    # Chat 1 failed and is waiting out its backoff; chat 2 was never tried.
+    assert sorted(json.loads(path.read_text(encoding="utf-8"))) == [[1, 10], [2, 20], [2, 21]]
+
+    restarted = DeletionQueue(FakeDelete(), path=str(path))
+    assert restarted.load() == 3
+    assert sorted(restarted.pending()) == sorted(queue.pending())
@@ -0,0 +1,212 @@
+from array import array
+import io
+import json
+import random
+
+import pytest
+
+from question_bank import (
+    QUIZ_CLUSTER_WINDOW,
+    Question,
+    build_alias_table,
+    build_question_index,
+    close_question_bank,
+    compile_question_bank,
+    draw_question_id,
+    iter_json_array,
+    load_questions,
+    map_question_bank,
+    next_question_id,
+    pick_alias,
+    shuffled_position,
+)
+from question_topics import TOPIC_IDS
+
+
+def question(text="What is a fork?", options=("A double attack", "A pin"), answer="A", **fields):
+    return dict(question=text, options=list(options), answer=answer, **fields)
+
+
+def write_bank(tmp_path, records, name="questions.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return str(path)
+
+
+def test_shuffled_position_is_a_bijection():
+    for size in (1, 2, 3, 7, 16, 17, 100, 1000, 4097):
+        for seed in (0, 1, 0xDEADBEEF):
+            assert sorted(shuffled_position(p, size, seed) for p in range(size)) == list(range(size))
+
+
+def test_rotation_covers_the_deck_and_restarts_when_the_bank_changes():
+    config = {}
+    eligible_ids = array('i', range(10, 60))
+    assert sorted(draw_question_id(eligible_ids, 50, config) for _ in range(50)) == list(range(10, 60))
+    draw_question_id(eligible_ids[:40], 40, config)
+    assert config["quiz_deck_size"] == 40 and config["quiz_cursor"] == 1
+
+
+def test_compiled_bank_maps_back_to_the_same_index(tmp_path):
+    records = [
+        question("Which opening is the Najdorf a variation of?", options=("Sicilian", "French", "Caro-Kann"), answer="A"),
+        question("What is zugzwang in an endgame?", options=("A move obligation that hurts", "A draw"), answer="A"),
+        question("Ünïcödé ♟ question?", options=("Ja", "Nein", "Vielleicht", "Ne"), answer="D", cluster=0),
+        question("Answer past the options?", answer="D"),
+        question("Answer is no option?", answer="Z"),
+        question("Which famous player won in 1858?", options=("Morphy", "Steinitz"), answer="A", topic="history"),
+    ]
+    index = load_questions(write_bank(tmp_path, records))
+    path = str(tmp_path / "questions.bin")
+    compile_question_bank(index, path)
+    mapped = map_question_bank(path)
+    assert len(mapped["questions"]) == len(index["questions"])
+    for original, loaded in zip(index["questions"], mapped["questions"]):
+        assert (loaded.question, loaded.options, loaded.correct_option_id, loaded.word_count) == \
+            (original.question, original.options, original.correct_option_id, original.word_count)
+    for key in ("eligible_ids", "cluster_ids", "topic_ids"):
+        assert list(mapped[key]) == list(index[key])
+    assert [list(ids) for ids in mapped["topic_eligible_ids"]] == [list(ids) for ids in index["topic_eligible_ids"]]
+    assert list(mapped["cluster_ids"])[2] == 0
+    assert mapped["questions"][-1].question == index["questions"][-1].question
+
+
+def test_a_bank_of_another_version_is_refused(tmp_path):
+    path = tmp_path / "questions.bin"
+    compile_question_bank(load_questions(write_bank(tmp_path, [question()])), str(path))
+    data = bytearray(path.read_bytes())
+    data[4] = 99
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        map_question_bank(str(path))
+
+
+def test_iter_json_array_at_small_chunk_sizes():
+    records = [question(f"Q{i} with “unicode” and, commas [] {{}}?", answer="B") for i in range(20)]
+    records.append({"nested": [1, {"a": [2, 3]}], "text": "a ] b , c"})
+    text = " \n[ " + " ,\n ".join(json.dumps(r, ensure_ascii=False) for r in records) + " ]\n"
+    for chunk_size in (1, 2, 3, 7, 64):
+        assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == records
+    assert list(iter_json_array(io.StringIO("[]"), chunk_size=1)) == []
+
+
+def test_iter_json_array_rejects_broken_input():
+    for text in ('{"question": 1}', '[{"a": 1} {"b": 2}]', '[{"a": 1},'):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(text), chunk_size=4))
+
+
+def test_json_lines_skips_only_the_malformed_line(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text("\n".join([json.dumps(question("One?")), "{broken", json.dumps(question("Two?"))]), encoding="utf-8")
+    index = load_questions(str(path))
+    assert [q.question for q in index["questions"]] == ["One?", "Two?"]
+    assert index["rejected"] == 1
+
+
+def test_alias_table_matches_the_weights():
+    weights = [5, 0, 1, 3, 1]
+    table = build_alias_table(weights)
+    probabilities, aliases = table
+    # Exact shares: each column contributes its own probability plus what it lends as an alias.
+    shares = [0.0] * len(weights)
+    for i, (p, alias) in enumerate(zip(probabilities, aliases)):
+        shares[i] += p / len(weights)
+        shares[alias] += (1 - p) / len(weights)
+    for share, weight in zip(shares, weights):
+        assert abs(share - weight / sum(weights)) < 1e-9
+    random.seed(1)
+    counts = [0] * len(weights)
+    for _ in range(50000):
+        counts[pick_alias(table)] += 1
+    assert counts[1] == 0
+    assert abs(counts[0] / 50000 - 0.5) < 0.01
+    assert build_alias_table([0, 0]) is None
+
+
+def test_bad_records_are_rejected_without_emptying_the_bank(tmp_path):
+    path = write_bank(tmp_path, [
+        question("Good one?"),
+        question("Option is null?", options=("Yes", None)),
+        question("Answer is a list?", answer=["B"]),
+        question(text=None),
+        "not a record",
+        question("Good two?", answer=" b"),
+        question("Answer is an index?", answer=1),
+    ])
+    index = load_questions(path)
+    assert [q.question for q in index["questions"]] == ["Good one?", "Good two?", "Answer is an index?"]
+    assert [q.correct_option_id for q in index["questions"]] == [0, 1, 1]
+    assert index["rejected"] == 4
+    assert len(index["cluster_ids"]) == len(index["topic_ids"]) == 3
+
+
+def test_only_questions_telegram_accepts_are_eligible(tmp_path):
+    path = write_bank(tmp_path, [
+        question("Fine?"),
+        question("Answer past the options?", answer="D"),
+        question("Answer is no option?", answer="Z"),
+        question("Index past the options?", answer=5),
+        question("One option?", options=("Only",)),
+        question("Too long? " + "x" * 300),
+        question("Too many options?", options=[str(i) for i in range(11)]),
+    ])
+    index = load_questions(path)
+    assert list(index["eligible_ids"]) == [0]
+
+
+def clustered_index(size=300, cluster_size=6):
+    questions = [Question(f"Question {i}?", ("Yes", "No"), 0, 2) for i in range(size)]
+    return build_question_index(questions, cluster_ids=[i - i % cluster_size for i in range(size)])
+
+
+def test_a_pass_serves_every_question_once_despite_cluster_skips():
+    index = clustered_index()
+    config = {}
+    first_pass = [next_question_id(index, config) for _ in range(300)]
+    assert sorted(first_pass) == list(range(300))
+    second_pass = [next_question_id(index, config) for _ in range(300)]
+    assert sorted(second_pass) == list(range(300))
+    assert len(config["quiz_deferred"]) <= QUIZ_CLUSTER_WINDOW
+
+
+def test_cluster_skips_keep_near_duplicates_apart():
+    index = clustered_index()
+    config = {}
+    clusters = [index["cluster_ids"][next_question_id(index, config)] for _ in range(300)]
+    close_repeats = sum(cluster in clusters[max(0, i - 4):i] for i, cluster in enumerate(clusters))
+    assert close_repeats < 15
+
+
+def test_topic_decks_serve_every_topic_question_once():
+    questions = [Question(f"Question {i}?", ("Yes", "No"), 0, 2) for i in range(120)]
+    topic_ids = [TOPIC_IDS["endgames"] if i % 3 == 0 else TOPIC_IDS["openings"] for i in range(120)]
+    index = build_question_index(questions, cluster_ids=[i - i % 4 for i in range(120)], topic_ids=topic_ids)
+    config = {"topic_weights": {"openings": 0}}
+    picks = [next_question_id(index, config) for _ in range(40)]
+    assert sorted(picks) == list(range(0, 120, 3))
+
+
+def test_a_reloaded_bank_starts_every_deck_over():
+    questions = [Question(f"Question {i}?", ("Yes", "No"), 0, 2) for i in range(60)]
+    old = build_question_index(questions, cluster_ids=[i - i % 6 for i in range(60)], generation="old")
+    config = {}
+    for _ in range(30):
+        next_question_id(old, config)
+    config["topic_decks"] = {"history": {"quiz_seed": 1, "quiz_cursor": 5, "quiz_deck_size": 60, "quiz_deferred": [59]}}
+    # Same size, so only the generation tells the banks apart.
+    new = build_question_index(questions, generation="new")
+    question_id = next_question_id(new, config)
+    assert config["quiz_generation"] == "new"
+    assert config["quiz_cursor"] == 1 and config["quiz_deferred"] == []
+    assert config["topic_decks"] is None
+    assert config["recent_clusters"] == [new["cluster_ids"][question_id]]
+
+
+def test_closing_a_mapped_bank_unmaps_it(tmp_path):
+    path = str(tmp_path / "questions.bin")
+    compile_question_bank(load_questions(write_bank(tmp_path, [question(), question("What is a pin?")])), path)
+    mapped = map_question_bank(path)
+    assert mapped["generation"]
+    close_question_bank(mapped)
+    assert mapped["questions"].buffer.closed
@@ -0,0 +1,55 @@
+import asyncio
+
+from rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED, RateLimiter, TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=10, capacity=3)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert abs(bucket.reserve(now) - 0.1) < 1e-9
+    assert abs(bucket.reserve(now) - 0.2) < 1e-9
+
+
+def test_pause_holds_calls_that_skip_per_chat_limits():
+    async def run():
+        limiter = RateLimiter(global_rate=1000, global_burst=1000)
+        limiter.pause(0.2, chat_id=42)
+        paused = await limiter.acquire(42, PRIORITY_INTERACTIVE, per_chat=False)
+        other = await limiter.acquire(43, PRIORITY_INTERACTIVE, per_chat=False)
+        return paused, other, limiter
+
+    paused, other, limiter = asyncio.run(run())
+    assert paused >= 0.19
+    assert other < 0.05
+    # Checking a pause must not create buckets for chats that were never limited.
+    assert 43 not in limiter.chat_buckets
+
+
+def test_pause_holds_per_chat_calls():
+    async def run():
+        limiter = RateLimiter(global_rate=1000, global_burst=1000)
+        limiter.pause(0.2, chat_id=42)
+        return await limiter.acquire(42, PRIORITY_SCHEDULED)
+
+    assert asyncio.run(run()) >= 0.19
+
+
+def test_interactive_calls_go_ahead_of_scheduled_ones():
+    async def run():
+        limiter = RateLimiter(global_rate=50, global_burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def call(priority, name):
+            await limiter.acquire(priority=priority)
+            order.append(name)
+
+        await asyncio.gather(
+            call(PRIORITY_SCHEDULED, "quiz 1"),
+            call(PRIORITY_SCHEDULED, "quiz 2"),
+            call(PRIORITY_INTERACTIVE, "settings"),
+        )
+        return order
+
+    assert asyncio.run(run())[0] == "settings"
@@ -0,0 +1,101 @@
+from collections import Counter
+
+from scheduler import QuizDispatcher, quiz_phase
+
+
+INTERVAL = 100
+
+
+def dispatcher(chats=1000):
+    d = QuizDispatcher(send=None, interval=INTERVAL, tick=1.0)
+    for chat_id in range(chats):
+        d.add(chat_id)
+    return d
+
+
+def queued(d):
+    chat_ids = []
+    while not d.queue.empty():
+        chat_ids.extend(d.queue.get_nowait()[1])
+    return chat_ids
+
+
+def test_phases_spread_over_the_interval():
+    phases = [quiz_phase(chat_id, INTERVAL) for chat_id in range(1000)]
+    assert all(0 <= phase < INTERVAL for phase in phases)
+    assert len({int(phase) for phase in phases}) == INTERVAL
+
+
+def test_each_chat_fires_once_per_interval():
+    d = dispatcher()
+    for second in range(INTERVAL):
+        d.tick(1000 * INTERVAL + second + 0.5)
+    assert Counter(queued(d)) == Counter(range(1000))
+
+
+def test_late_tick_catches_up_skipped_slots():
+    d = dispatcher()
+    d.tick(1001.2)
+    queued(d)
+    d.tick(1004.5)
+    expected = {chat_id for chat_id in range(1000) if int(quiz_phase(chat_id, INTERVAL)) in (2, 3, 4)}
+    assert set(queued(d)) == expected
+    assert abs(d.stats["lag_seconds"] - 2.5) < 1e-9
+
+
+def test_tick_in_the_slot_just_drained_dispatches_nothing():
+    d = dispatcher()
+    first = d.tick(1001.2)
+    assert 0 < first < 1000
+    assert d.tick(1001.9) == 0
+    assert len(queued(d)) == first
+
+
+def test_clock_stepping_back_does_not_resend():
+    d = dispatcher()
+    for second in range(1000, 1006):
+        d.tick(second + 0.5)
+    queued(d)
+    assert d.tick(1002.5) == 0
+    assert d.tick(1005.7) == 0
+    d.tick(1006.1)
+    expected = {chat_id for chat_id in range(1000) if int(quiz_phase(chat_id, INTERVAL)) == 6}
+    assert set(queued(d)) == expected
+
+
+def test_clock_stepping_back_over_an_interval_resyncs():
+    d = dispatcher()
+    d.tick(5000.5)
+    queued(d)
+    d.tick(1003.5)
+    expected = {chat_id for chat_id in range(1000) if int(quiz_phase(chat_id, INTERVAL)) == 3}
+    assert set(queued(d)) == expected
+
+
+def slot_start(chat_id, interval_start):
+    return interval_start + int(quiz_phase(chat_id, INTERVAL))
+
+
+def test_send_now_skips_a_wheel_firing_within_half_an_interval():
+    d = dispatcher(chats=0)
+    chat_id = next(c for c in range(1000) if quiz_phase(c, INTERVAL) >= 20)
+    d.add(chat_id)
+    due = slot_start(chat_id, 1000)
+    d.send_now(chat_id, now=due - 10)
+    assert queued(d) == [chat_id]
+    d.tick(due + 0.5)
+    assert queued(d) == []
+    assert d.stats["skipped_recent"] == 1
+    d.tick(due + 0.5 + INTERVAL)
+    assert queued(d) == [chat_id]
+
+
+def test_send_now_keeps_a_wheel_firing_over_half_an_interval_away():
+    d = dispatcher(chats=0)
+    chat_id = next(c for c in range(1000) if quiz_phase(c, INTERVAL) >= 70)
+    d.add(chat_id)
+    due = slot_start(chat_id, 1000)
+    d.send_now(chat_id, now=due - 60)
+    queued(d)
+    d.tick(due + 0.5)
+    assert queued(d) == [chat_id]
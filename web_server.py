@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_BODY = int(os.environ.get("HTTP_MAX_BODY", 1024 * 1024))
+HTTP_IDLE_TIMEOUT = float(os.environ.get("HTTP_IDLE_TIMEOUT", 75))
+
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# ----------------------------- Web Server ----------------------------- #
+# A minimal HTTP/1.1 server on asyncio streams, so the health checks, metrics
+# and webhook run on the bot's own event loop: if the loop is wedged, /healthz
+# stops answering too. Connections are kept alive and requests need a
+# Content-Length body, which is all Telegram and probes send. A route is an
+# async handler(request) returning (status, content_type, body).
+
+class Request:
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+def text_response(text, status=200):
+    return status, "text/plain; charset=utf-8", text
+
+def json_response(data, status=200):
+    return status, "application/json", json.dumps(data)
+
+class WebServer:
+    def __init__(self, host="0.0.0.0", port=8080):
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self.server = None
+        self.connections = set()
+        self.stats = {"requests": 0, "errors": 0}
+
+    def route(self, path, handler, methods=("GET",)):
+        for method in methods:
+            self.routes[(method, path)] = handler
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > HTTP_MAX_BODY:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+    async def respond(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self.routes):
+                return text_response("Method Not Allowed", 405)
+            return text_response("Not Found", 404)
+        try:
+            return await handler(request)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Web request {request.method} {request.path} failed: {e}")
+            return text_response("Internal Server Error", 500)
+
+    async def handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), HTTP_IDLE_TIMEOUT)
+                except ValueError:
+                    request, response = None, text_response("Bad Request", 400)
+                else:
+                    if request is None:
+                        break
+                    self.stats["requests"] += 1
+                    response = await self.respond(request)
+                status, content_type, body = response
+                data = body.encode("utf-8") if isinstance(body, str) else body
+                keep_alive = request is not None and request.headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Web server listening on {self.host}:{self.port}.")
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections would otherwise hold wait_closed() open.
+            for writer in list(self.connections):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None